@@ -419,13 +419,14 @@ if __name__ == "__main__":
                                  trending_sentiment_per_publisher_plot)
         st.markdown("#### WordCloud:")
 
-        if not filtered_df["review_text"].dropna().empty and filtered_df["title"].nunique() == 1:
+        has_reviews = filtered_df["review_text"].notna().any()
+        if has_reviews and filtered_df["title"].nunique() == 1:
             review_word_cloud_plot = plot_word_cloud_all_releases(filtered_df)
             genre_word_cloud_plot = plot_word_cloud_all_releases_genre(
                 filtered_df)
 
             wordcloud_rows(review_word_cloud_plot, genre_word_cloud_plot)
-        elif filtered_df["review_text"].dropna().empty and filtered_df["title"].nunique() == 1:
+        elif not has_reviews and filtered_df["title"].nunique() == 1:
             st.markdown("No Reviews for Selected Title")
         else:
             st.markdown(
@@ -4,7 +4,6 @@ from os import environ, _Environ
 
 from altair.vegalite.v5.api import Chart
 from dotenv import load_dotenv
-from functools import reduce
 import pandas as pd
 from pandas import DataFrame
 from psycopg2 import connect, Error
@@ -365,28 +364,6 @@ def filter_data(df_releases: DataFrame, filter: dict) -> DataFrame:
     return df_releases
 
 
-def calculate_sum_sentiment(sentiment: float, score: int) -> float:
-    """
-    Calculates total sentiment score by multiplying sentiment associated with
-    a review multiplied by the review_score (represents the number of users who
-    agree with this review)
-
-    Args:
-        sentiment (float): A value associated with how positive or negative the
-        review is considered to be
-
-        score (int): A value associated with the number of users who up-voted a 
-        review
-
-    Returns:
-        float: A sentiment value which takes into account the number of users
-        who agreed with a given review
-    """
-    if score != 0:
-        return sentiment * (score + 1)
-    return sentiment
-
-
 def aggregate_data(df_releases: DataFrame) -> DataFrame:
     """
     Transform data in releases DataFrame to find aggregated sentiment from individual reviews
@@ -396,36 +373,27 @@ def aggregate_data(df_releases: DataFrame) -> DataFrame:
         DataFrame: A DataFrame containing new release data with aggregated data for each release
     """
 
-    df_releases["weighted_sentiment"] = df_releases.apply(lambda row:
-                                                          calculate_sum_sentiment(row["sentiment"], row["review_score"]), axis=1)
-
-    review_rows_count = df_releases.groupby(
-        "game_id")["weighted_sentiment"].count()
-    total_sum_scores = df_releases.groupby(
-        "game_id")["weighted_sentiment"].sum()
-    total_weights = df_releases.groupby("game_id")[
-        "review_score"].sum()
-
-    total_weights = total_weights + review_rows_count
-    total_sentiment_scores = total_sum_scores / total_weights
-
-    df_releases["avg_sentiment"] = df_releases["game_id"].apply(
-        lambda row: round(total_sentiment_scores.loc[row], 1))
-
-    review_per_title = df_releases.groupby('game_id')[
-        'review_id'].nunique()
-    review_per_title = review_per_title.to_frame()
-
-    review_per_title.columns = ["num_of_reviews"]
+    # A review counts once more for every user who up-voted it
+    df_releases["weighted_sentiment"] = df_releases["sentiment"] * \
+        (df_releases["review_score"] + 1).where(df_releases["review_score"] != 0, 1)
 
-    data_frames = [df_releases, review_per_title]
+    sentiment_per_game = df_releases.groupby("game_id", sort=False).agg(
+        review_rows_count=("weighted_sentiment", "count"),
+        total_sum_scores=("weighted_sentiment", "sum"),
+        total_weights=("review_score", "sum"),
+        num_of_reviews=("review_id", "nunique"))
 
-    df_merged = reduce(lambda left, right: pd.merge(left, right, on=['game_id'],
-                                                    how='outer'), data_frames)
+    total_weights = sentiment_per_game["total_weights"] + \
+        sentiment_per_game["review_rows_count"]
+    total_sentiment_scores = (
+        sentiment_per_game["total_sum_scores"] / total_weights).round(1)
 
-    df_merged.drop(["weighted_sentiment"], axis=1, inplace=True)
+    df_releases["avg_sentiment"] = df_releases["game_id"].map(
+        total_sentiment_scores)
+    df_releases["num_of_reviews"] = df_releases["game_id"].map(
+        sentiment_per_game["num_of_reviews"])
 
-    return df_merged
+    return df_releases.drop(columns=["weighted_sentiment"])
 
 
 def format_columns(df_releases: DataFrame) -> DataFrame:
@@ -438,8 +406,7 @@ def format_columns(df_releases: DataFrame) -> DataFrame:
     Returns:
         DataFrame: A DataFrame containing data with formatted columns
     """
-    df_releases['Price'] = df_releases['Price'].apply(
-        lambda x: f"£{x:.2f}")
+    df_releases['Price'] = "£" + df_releases['Price'].map("{:.2f}".format)
     df_releases['Release Date'] = df_releases['Release Date'].dt.strftime(
         '%d/%m/%Y')
     df_releases['Community Sentiment'] = df_releases['Community Sentiment'].replace("nan",
@@ -1,9 +1,23 @@
 """File containing necessary pytest fixtures for testing"""
+from unittest.mock import MagicMock
+
 import pytest
 import pandas as pd
 
 
 @pytest.fixture
+def fake_conn() -> MagicMock:
+    """Fake database connection"""
+    return MagicMock()
+
+
+@pytest.fixture
+def fake_cursor(fake_conn: MagicMock) -> MagicMock:
+    """Fake cursor returned by the fake connection's cursor context manager"""
+    return fake_conn.cursor.return_value.__enter__.return_value
+
+
+@pytest.fixture(scope="session")
 def fake_html() -> str:
     """Fake html scraping for testing"""
     return """<a class="search_result_row ds_collapse_flag" data-ds-appid="12345"
@@ -33,7 +47,7 @@ def fake_html() -> str:
                 </a>"""
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def fake_html_soup() -> str:
     """Fake html after it has been passed through soup"""
     return """<html>
@@ -67,7 +81,7 @@ def fake_html_soup() -> str:
         </html>"""
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def html_no_tags() -> str:
     """Fake html containing tag and price data"""
     return """<html>
@@ -150,7 +164,7 @@ def fake_genre_data() -> pd.DataFrame:
     """Fake genre data columns"""
     genre = pd.DataFrame(
         [['fake_genre', True], ['fake 2', False]], columns=['genre', 'user_generated'])
-    return genre[["genre", "user_generated", "genre", "user_generated"]]
+    return genre[["genre", "user_generated"]]
 
 
 @pytest.fixture
@@ -193,12 +207,6 @@ def fake_game_data() -> pd.DataFrame:
     return genre[['app_id', 'title', 'release_date', 'price', 'sale_price', 'platform_id']]
 
 
-@pytest.fixture
-def fake_tuples() -> list[tuple]:
-    """Fake tuples of id"""
-    return [(1, 2), (3, 4)]
-
-
 @pytest.fixture
 def fake_complete_data() -> pd.DataFrame:
     """Fake final game dataframe"""
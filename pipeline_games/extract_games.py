@@ -1,8 +1,15 @@
 """Script to get information from Steam website and API"""
 import csv
+from concurrent.futures import ThreadPoolExecutor
 from urllib.request import urlopen
 from bs4 import BeautifulSoup
 import requests
+from requests.adapters import HTTPAdapter
+
+MAX_WORKERS = 32
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(pool_connections=MAX_WORKERS,
+                                      pool_maxsize=MAX_WORKERS))
 
 
 def get_html(url: str) -> str:
@@ -97,33 +104,39 @@ def get_publisher_name(data: dict) -> list:
     return publishers[:-1]
 
 
+def update_game(game: dict) -> dict:
+    """Update a single game dictionary with information from its store page and the API"""
+    game_webpage = SESSION.get(
+        f"""https://store.steampowered.com/app/{game["app_id"]}""", timeout=10).text
+    soup = BeautifulSoup(game_webpage, "html.parser")
+    tags_for_game = parse_game_bs(soup)
+    game["user_tags"] = tags_for_game
+    price_of_game = parse_price_bs(soup)
+    game.update(price_of_game)
+
+    request = SESSION.get(
+        f"""https://store.steampowered.com/api/appdetails?appids={game["app_id"]}""",
+        timeout=10)
+
+    response = request.json()[game["app_id"]]['data']
+    compatible_systems = system_requirements(response)
+
+    game.update(compatible_systems)
+    steam_genres = get_genre_from_steam(response)
+    game['genres'] = steam_genres
+    developer = get_developer_name(response)
+    game['developers'] = developer
+    publisher = get_publisher_name(response)
+    game['publishers'] = publisher
+
+    return game
+
+
 def update_game_information(all_recent_games: list):
-    """Update game dictionary with information from the API"""
-    for game in all_recent_games:
-        game_webpage = get_html(
-            f"""https://store.steampowered.com/app/{game["app_id"]}""")
-        soup = BeautifulSoup(game_webpage, "html.parser")
-        tags_for_game = parse_game_bs(soup)
-        game["user_tags"] = tags_for_game
-        price_of_game = parse_price_bs(soup)
-        game.update(price_of_game)
-
-        request = requests.get(
-            f"""https://store.steampowered.com/api/appdetails?appids={game["app_id"]}""",
-            timeout=10)
-
-        response = request.json()[game["app_id"]]['data']
-        compatible_systems = system_requirements(response)
-
-        game.update(compatible_systems)
-        steam_genres = get_genre_from_steam(response)
-        game['genres'] = steam_genres
-        developer = get_developer_name(response)
-        game['developers'] = developer
-        publisher = get_publisher_name(response)
-        game['publishers'] = publisher
-
-    return all_recent_games
+    """Update game dictionaries with information from the API,
+    fetching several games at once over pooled connections"""
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        return list(executor.map(update_game, all_recent_games))
 
 
 def convert_to_csv(files: list[dict], filename: str) -> None:
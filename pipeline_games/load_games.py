@@ -1,10 +1,18 @@
 """Script for loading to database"""
+import csv
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO, StringIO
 from os import environ
 from dotenv import load_dotenv
 import pandas as pd
 from psycopg2 import connect, Error, sql
 from psycopg2.extensions import connection
-from psycopg2.extras import RealDictCursor, execute_batch
+from psycopg2.pool import ThreadedConnectionPool
+
+PGCOPY_HEADER = b'PGCOPY\n\xff\r\n\x00' + struct.pack('!ii', 0, 0)
+PGCOPY_TRAILER = struct.pack('!h', -1)
+POSTGRES_EPOCH = pd.Timestamp('2000-01-01')
 
 
 def get_db_connection(config) -> connection:
@@ -15,245 +23,284 @@ def get_db_connection(config) -> connection:
             password=config['DATABASE_PASSWORD'],
             host=config['DATABASE_ENDPOINT'],
             port=config['DATABASE_PORT'],
-            database=config['DATABASE_NAME'],
-            cursor_factory=RealDictCursor)
+            database=config['DATABASE_NAME'])
     except (Error, ValueError) as err:
         return f"Error connecting to database. {err}"
 
 
-def execute_batch_columns(conn: connection, data: pd.DataFrame, table: str, column: str, page_size=100) -> None:
-    """batch execution of adding specified data to the database"""
-    tuples = list(zip(data.unique()))
-    query = sql.SQL("""INSERT INTO {table}({column})
-            VALUES(%s) ON CONFLICT ({column}) DO NOTHING;""").format(
-        table=sql.Identifier(table), column=sql.Identifier(column))
+def get_db_connection_pool(config, max_connections=4) -> ThreadedConnectionPool:
+    """Creates a pool of connections to the database with game data,
+    without waiting on a WAL flush for each commit of the bulk load"""
+    return ThreadedConnectionPool(
+        1, max_connections,
+        user=config['DATABASE_USERNAME'],
+        password=config['DATABASE_PASSWORD'],
+        host=config['DATABASE_ENDPOINT'],
+        port=config['DATABASE_PORT'],
+        database=config['DATABASE_NAME'],
+        options='-c synchronous_commit=off')
+
+
+def copy_to_staging_table(conn: connection, data: pd.DataFrame, table: str,
+                          columns: sql.Composable) -> None:
+    """Copies data into a temporary staging table using COPY FROM STDIN"""
+    buffer = StringIO()
+    data.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    create_query = sql.SQL("""CREATE TEMP TABLE IF NOT EXISTS {table} ({columns});
+            TRUNCATE {table};""").format(
+        table=sql.Identifier(table), columns=columns)
+    copy_query = sql.SQL("COPY {table} FROM STDIN WITH CSV").format(
+        table=sql.Identifier(table))
     with conn.cursor() as cur:
-        try:
-            execute_batch(cur, query, tuples, page_size)
-            conn.commit()
-            print("execute_batch() done")
-        except Error as err:
-            print(f"Error: {err}")
-            conn.rollback()
+        cur.execute(create_query)
+        cur.copy_expert(copy_query, buffer)
 
 
-def execute_batch_columns_for_genres(conn: connection, data: pd.DataFrame, table: str, page_size=100) -> None:
-    """batch execution of adding genres into the database"""
-    tuples = [tuple(x) for x in data.to_numpy()]
-    cols = 'genre,user_generated'
-
-    query = sql.SQL("""INSERT INTO {table}({cols}) SELECT %s,%s WHERE NOT EXISTS
-            (SELECT genre_id FROM genre
-            WHERE genre = %s AND user_generated = %s);""").format(
-        table=sql.Identifier(table), cols=sql.SQL(cols))
-    with conn.cursor() as cur:
-        try:
-            execute_batch(cur, query, tuples, page_size)
-            conn.commit()
-            print("execute_batch() done")
-        except Error as err:
-            print(f"Error: {err}")
-            conn.rollback()
-
-
-def execute_batch_columns_for_games(conn: connection, data: pd.DataFrame, table: str, page_size=100) -> None:
-    """batch execution of adding games into the database"""
-    tuples = [tuple(x) for x in data.to_numpy()]
-    cols = ','.join(list(data.columns))
-    query = sql.SQL("""INSERT INTO {table}({cols}) VALUES (%s,%s,%s,%s,%s,%s)
-            ON CONFLICT (app_id) DO NOTHING RETURNING game_id;""").format(
-        table=sql.Identifier(table), cols=sql.SQL(cols))
+def insert_distinct_columns(conn: connection, data: pd.Series, table: str, column: str) -> None:
+    """Stages the specified data and inserts its distinct values into the database"""
+    staging_table = f"staging_{table}"
+    query = sql.SQL("""INSERT INTO {table}({column})
+            SELECT DISTINCT {column} FROM {staging_table} WHERE {column} IS NOT NULL
+            ON CONFLICT ({column}) DO NOTHING;""").format(
+        table=sql.Identifier(table), column=sql.Identifier(column),
+        staging_table=sql.Identifier(staging_table))
+    try:
+        copy_to_staging_table(conn, data.to_frame(), staging_table,
+                              sql.SQL("{column} TEXT").format(column=sql.Identifier(column)))
+        with conn.cursor() as cur:
+            cur.execute(query)
+        conn.commit()
+        print("insert from staging done")
+    except Error as err:
+        print(f"Error: {err}")
+        conn.rollback()
+
+
+def insert_distinct_genres(conn: connection, data: pd.DataFrame) -> None:
+    """Stages genre data and inserts the distinct genres into the database"""
+    query = """INSERT INTO genre(genre, user_generated)
+            SELECT DISTINCT genre, user_generated FROM staging_genre
+            WHERE genre IS NOT NULL
+            ON CONFLICT (genre, user_generated) DO NOTHING;"""
+    try:
+        copy_to_staging_table(conn, data, "staging_genre",
+                              sql.SQL("genre TEXT, user_generated BOOLEAN"))
+        with conn.cursor() as cur:
+            cur.execute(query)
+        conn.commit()
+        print("insert from staging done")
+    except Error as err:
+        print(f"Error: {err}")
+        conn.rollback()
+
+
+def encode_games_binary(data: pd.DataFrame) -> BytesIO:
+    """Encodes game rows in the PostgreSQL binary COPY format"""
+    buffer = BytesIO()
+    buffer.write(PGCOPY_HEADER)
+    release_days = (pd.to_datetime(data['release_date']) - POSTGRES_EPOCH).dt.days
+    for app_id, title, days, price, sale_price, platform_id in zip(
+            data['app_id'], data['title'], release_days,
+            data['price'], data['sale_price'], data['platform_id']):
+        title = str(title).encode('utf-8')
+        buffer.write(struct.pack(f'!hii i{len(title)}s ii id id ih',
+                                 6, 4, int(app_id), len(title), title, 4, int(days),
+                                 8, float(price), 8, float(sale_price), 2, int(platform_id)))
+    buffer.write(PGCOPY_TRAILER)
+    buffer.seek(0)
+    return buffer
+
+
+def insert_games_binary(conn: connection, data: pd.DataFrame) -> None:
+    """Copies games into a staging table with binary COPY and inserts the new ones"""
     with conn.cursor() as cur:
         try:
-            execute_batch(cur, query, tuples, page_size)
+            cur.execute("""CREATE TEMP TABLE IF NOT EXISTS staging_new_game (
+                        app_id INT, title TEXT, release_date DATE,
+                        price FLOAT, sale_price FLOAT, platform_id SMALLINT);
+                    TRUNCATE staging_new_game;""")
+            cur.copy_expert("COPY staging_new_game FROM STDIN WITH (FORMAT BINARY)",
+                            encode_games_binary(data))
+            cur.execute("""INSERT INTO game(app_id, title, release_date, price, sale_price, platform_id)
+                    SELECT app_id, title, release_date, price, sale_price, platform_id
+                    FROM staging_new_game
+                    ON CONFLICT (app_id) DO NOTHING;""")
             conn.commit()
-            print("execute_batch() done")
+            print("binary copy done")
         except Error as err:
             print(f"Error: {err}")
             conn.rollback()
 
 
-def get_existing_platform_data(mac_c, windows_c, linux_c, conn: connection, cache: dict) -> int:
-    """Retrieves the existing data for platform using cache and return platform_id"""
-    value = f'{mac_c} {windows_c} {linux_c}'
-    if value in cache.keys():
-        return cache[value]
-
-    with conn.cursor() as cur:
-        cur.execute("""SELECT platform_id FROM platform
-                    WHERE mac = %s AND windows = %s AND linux = %s;""",
-                    [mac_c, windows_c, linux_c])
-        id_value = cur.fetchone()['platform_id']
-        cache[value] = id_value
-        return cache[value]
-
-
-def get_all_game_genre_ids(conn: connection, data: list) -> list[tuple]:
-    """Returns all game_genre_ids for linking table"""
-    tuples = [tuple(x) for x in data.to_numpy()]
-    query = """SELECT game.game_id, genre.genre_id FROM genre CROSS JOIN game
-            WHERE game.app_id = %s AND genre.genre = %s AND user_generated = %s;"""
-    all_ids = []
-    for line in tuples:
-        with conn.cursor() as cur:
-            cur.execute(query, line)
-            game_genre = cur.fetchall()
-            all_ids.append(
-                (game_genre[0]['game_id'], game_genre[0]['genre_id'],
-                 game_genre[0]['game_id'], game_genre[0]['genre_id']))
-    return all_ids
-
-
-def get_all_publisher_game_ids(conn: connection, data: list) -> list[tuple]:
-    """Returns all game_publisher ids for linking table"""
-    tuples = [tuple(x) for x in data.to_numpy()]
-    query = """SELECT game.game_id, publisher.publisher_id FROM publisher CROSS JOIN game
-            WHERE game.app_id = %s AND publisher.publisher_name = %s;"""
-    all_ids = []
-    for line in tuples:
+def copy_csv_to_staging_table(conn: connection, filename: str, table: str) -> None:
+    """Streams a csv file straight into a temporary text staging table using COPY FROM STDIN"""
+    with open(filename, encoding='utf-8', newline='') as file:
+        header = next(csv.reader(file))
+        columns = sql.SQL(',').join(
+            sql.SQL("{} TEXT").format(sql.Identifier(name or 'row_index')) for name in header)
+        file.seek(0)
         with conn.cursor() as cur:
-            cur.execute(query, line)
-            game_genre = cur.fetchall()
-            all_ids.append(
-                (game_genre[0]['game_id'], game_genre[0]['publisher_id'],
-                 game_genre[0]['game_id'], game_genre[0]['publisher_id']))
-    return all_ids
-
-
-def get_all_developer_game_ids(conn: connection, data: list) -> list[tuple]:
-    """Returns all game_developer ids for linking table"""
-    tuples = [tuple(x) for x in data.to_numpy()]
-    query = """SELECT game.game_id, developer.developer_id FROM developer CROSS JOIN game
-            WHERE game.app_id = %s AND developer.developer_name = %s;"""
-    all_ids = []
-    for line in tuples:
-        with conn.cursor() as cur:
-            cur.execute(query, line)
-            game_genre = cur.fetchall()
-            all_ids.append(
-                (game_genre[0]['game_id'], game_genre[0]['developer_id'],
-                 game_genre[0]['game_id'], game_genre[0]['developer_id']))
-    return all_ids
-
-
-def add_to_genre_link_table(conn: connection, tuples: list, page_size=100) -> None:
-    """Updates genre link table"""
-    query = """INSERT INTO game_genre_link(game_id, genre_id) SELECT %s, %s
-                WHERE NOT EXISTS (SELECT game_id, genre_id
-                FROM game_genre_link WHERE game_id = %s AND genre_id = %s);"""
-    with conn.cursor() as cur:
-        try:
-            execute_batch(cur, query, tuples, page_size)
-            conn.commit()
-            print("execute_batch() done")
-        except Error as err:
-            print(f"Error: {err}")
-            conn.rollback()
+            cur.execute(sql.SQL("""CREATE TEMP TABLE IF NOT EXISTS {table} ({columns});
+                    TRUNCATE {table};""").format(
+                table=sql.Identifier(table), columns=columns))
+            cur.copy_expert(sql.SQL("COPY {table} FROM STDIN WITH (FORMAT CSV, HEADER TRUE)").format(
+                table=sql.Identifier(table)), file)
 
 
-def add_to_publisher_link_table(conn: connection, tuples: list, page_size=100) -> None:
-    """Updates publisher link table"""
-    query = """INSERT INTO game_publisher_link(game_id, publisher_id)
-                SELECT %s, %s WHERE NOT EXISTS (SELECT game_id, publisher_id 
-                FROM game_publisher_link WHERE game_id = %s AND publisher_id = %s);"""
+def upload_games_from_csv(filename: str, conn: connection) -> None:
+    """Uploads new games by copying the csv file to the server and joining on platform there"""
+    try:
+        copy_csv_to_staging_table(conn, filename, 'staging_game')
+        with conn.cursor() as cur:
+            cur.execute("""INSERT INTO game(app_id, title, release_date, price, sale_price, platform_id)
+                    SELECT staging_game.app_id::INT, staging_game.title,
+                        staging_game.release_date::DATE, staging_game.full_price::FLOAT,
+                        staging_game.sale_price::FLOAT, platform.platform_id
+                    FROM staging_game
+                    JOIN platform
+                        ON platform.mac = staging_game.mac::BOOLEAN
+                        AND platform.windows = staging_game.windows::BOOLEAN
+                        AND platform.linux = staging_game.linux::BOOLEAN
+                    WHERE staging_game.title IS NOT NULL
+                        AND staging_game.release_date IS NOT NULL
+                    ON CONFLICT (app_id) DO NOTHING;""")
+        conn.commit()
+        print("copy from csv done")
+    except Error as err:
+        print(f"Error: {err}")
+        conn.rollback()
+
+
+def get_platforms(conn: connection) -> dict:
+    """Retrieves every platform id keyed by its (mac, windows, linux) combination with a single query"""
     with conn.cursor() as cur:
-        try:
-            execute_batch(cur, query, tuples, page_size)
-            conn.commit()
-            print("execute_batch() done")
-        except Error as err:
-            print(f"Error: {err}")
-            conn.rollback()
+        cur.execute("""SELECT platform_id, mac, windows, linux FROM platform;""")
+        platforms = cur.fetchall()
+    return {(mac, windows, linux): platform_id for platform_id, mac, windows, linux in platforms}
 
 
-def add_to_developer_link_table(conn: connection, tuples: list, page_size=100) -> None:
-    """Updates developer link table"""
-    query = """INSERT INTO game_developer_link(game_id, developer_id)
-                SELECT %s, %s WHERE NOT EXISTS (SELECT game_id, developer_id
-                FROM game_developer_link WHERE game_id = %s AND developer_id = %s);"""
+def insert_links_from_staging(conn: connection, data: pd.DataFrame, staging_table: str,
+                              columns: sql.Composable, query: str) -> None:
+    """Stages game data and upserts the resolved ids into a link table with one query,
+    leaving the commit to the caller"""
+    copy_to_staging_table(conn, data, staging_table, columns)
     with conn.cursor() as cur:
-        try:
-            execute_batch(cur, query, tuples, page_size)
-            conn.commit()
-            print("execute_batch() done")
-        except Error as err:
-            print(f"Error: {err}")
-            conn.rollback()
+        cur.execute(query)
 
 
 def upload_developers(data: pd.DataFrame, conn: connection) -> None:
     """Uploads new developers"""
     developers_data = data['developers']
-    execute_batch_columns(conn, developers_data,
-                          'developer', 'developer_name', page_size=100)
+    insert_distinct_columns(conn, developers_data, 'developer', 'developer_name')
 
 
 def upload_publishers(data: pd.DataFrame, conn: connection) -> None:
     """Uploads new publishers"""
     publishers_data = data['publishers']
-    execute_batch_columns(conn, publishers_data,
-                          'publisher', 'publisher_name', page_size=100)
+    insert_distinct_columns(conn, publishers_data, 'publisher', 'publisher_name')
 
 
 def upload_genres(data: pd.DataFrame, conn: connection) -> None:
     """Uploads new genres"""
-    genres = data[["genre", "user_generated", "genre", "user_generated"]]
-    execute_batch_columns_for_genres(conn, genres,
-                                     'genre', page_size=100)
+    genres = data[["genre", "user_generated"]]
+    insert_distinct_genres(conn, genres)
 
 
 def upload_games(data: pd.DataFrame, conn: connection) -> None:
     """Uploads new games"""
-    platform_cache = {}
-    data['platform_id'] = data.apply(
-        lambda row: get_existing_platform_data(
-            row['mac'], row['windows'], row['linux'], conn, platform_cache), axis=1)
+    platforms = get_platforms(conn)
+    platform_ids = pd.MultiIndex.from_frame(
+        data[['mac', 'windows', 'linux']]).map(platforms)
+    data = data.assign(platform_id=platform_ids).dropna(
+        subset=['platform_id', 'title', 'release_date'])
 
     new_game_data = data.rename(columns={'full_price': 'price'})
 
     games_to_load = new_game_data[[
         'app_id', 'title', 'release_date', 'price', 'sale_price', 'platform_id']]
-    execute_batch_columns_for_games(conn, games_to_load,
-                                    'game', page_size=100)
+    insert_games_binary(conn, games_to_load)
 
 
 def upload_game_genre_link(data: pd.DataFrame, conn: connection) -> None:
     """Uploads to game_genre_linking table"""
     game_genre = data[["app_id", "genre", "user_generated"]]
-    id_tuples = get_all_game_genre_ids(conn, game_genre)
-    add_to_genre_link_table(conn, id_tuples, page_size=100)
+    query = """INSERT INTO game_genre_link(game_id, genre_id)
+            SELECT DISTINCT game.game_id, genre.genre_id FROM staging_game_genre
+            JOIN game ON game.app_id = staging_game_genre.app_id
+            JOIN genre ON genre.genre = staging_game_genre.genre
+            AND genre.user_generated = staging_game_genre.user_generated
+            ON CONFLICT (game_id, genre_id) DO NOTHING;"""
+    insert_links_from_staging(conn, game_genre, "staging_game_genre",
+                              sql.SQL("app_id INT, genre TEXT, user_generated BOOLEAN"), query)
 
 
 def upload_game_publisher_link(data: pd.DataFrame, conn: connection) -> None:
     """Uploads to game_publisher table"""
     game_publisher = data[["app_id", "publishers"]].drop_duplicates()
-    id_tuples = get_all_publisher_game_ids(conn, game_publisher)
-    add_to_publisher_link_table(conn, id_tuples, page_size=100)
+    query = """INSERT INTO game_publisher_link(game_id, publisher_id)
+            SELECT DISTINCT game.game_id, publisher.publisher_id FROM staging_game_publisher
+            JOIN game ON game.app_id = staging_game_publisher.app_id
+            JOIN publisher ON publisher.publisher_name = staging_game_publisher.publisher_name
+            ON CONFLICT (game_id, publisher_id) DO NOTHING;"""
+    insert_links_from_staging(conn, game_publisher, "staging_game_publisher",
+                              sql.SQL("app_id INT, publisher_name TEXT"), query)
 
 
 def upload_game_developer_link(data: pd.DataFrame, conn: connection) -> None:
     """Uploads to game_publisher table"""
     game_developer = data[["app_id", "developers"]].drop_duplicates()
-    id_tuples = get_all_developer_game_ids(conn, game_developer)
-    add_to_developer_link_table(conn, id_tuples, page_size=100)
+    query = """INSERT INTO game_developer_link(game_id, developer_id)
+            SELECT DISTINCT game.game_id, developer.developer_id FROM staging_game_developer
+            JOIN game ON game.app_id = staging_game_developer.app_id
+            JOIN developer ON developer.developer_name = staging_game_developer.developer_name
+            ON CONFLICT (game_id, developer_id) DO NOTHING;"""
+    insert_links_from_staging(conn, game_developer, "staging_game_developer",
+                              sql.SQL("app_id INT, developer_name TEXT"), query)
+
+
+def upload_game_links(data: pd.DataFrame, conn: connection) -> None:
+    """Uploads to every game link table in a single transaction"""
+    try:
+        upload_game_genre_link(data, conn)
+        upload_game_publisher_link(data, conn)
+        upload_game_developer_link(data, conn)
+        conn.commit()
+        print("insert from staging done")
+    except Error as err:
+        print(f"Error: {err}")
+        conn.rollback()
+
+
+def upload_with_pooled_connection(pool: ThreadedConnectionPool, upload_function, data: pd.DataFrame) -> None:
+    """Runs an upload on its own connection taken from the pool"""
+    conn = pool.getconn()
+    try:
+        upload_function(data, conn)
+    finally:
+        pool.putconn(conn)
+
+
+def upload_independent_tables(pool: ThreadedConnectionPool, data: pd.DataFrame) -> None:
+    """Uploads publishers, developers and genres concurrently, one connection each"""
+    uploads = [upload_publishers, upload_developers, upload_genres]
+    with ThreadPoolExecutor(max_workers=len(uploads)) as executor:
+        list(executor.map(
+            lambda upload: upload_with_pooled_connection(pool, upload, data), uploads))
 
 
 if __name__ == "__main__":
     load_dotenv()
     configuration = environ
-    connect_d = get_db_connection(configuration)
+    connection_pool = get_db_connection_pool(configuration)
 
-    final_df = pd.read_csv("genres.csv")
-    game_data = pd.read_csv("final_games.csv")
+    final_df = pd.read_parquet("genres.parquet")
 
     try:
-        upload_publishers(final_df, connect_d)
-        upload_developers(final_df, connect_d)
-        upload_genres(final_df, connect_d)
-        upload_games(game_data, connect_d)
-        upload_game_genre_link(final_df, connect_d)
-        upload_game_publisher_link(final_df, connect_d)
-        upload_game_developer_link(final_df, connect_d)
+        upload_independent_tables(connection_pool, final_df)
+        connect_d = connection_pool.getconn()
+        upload_games_from_csv("final_games.csv", connect_d)
+        upload_game_links(final_df, connect_d)
 
     finally:
-        connect_d.close()
+        connection_pool.closeall()
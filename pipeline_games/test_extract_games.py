@@ -1,8 +1,9 @@
 """Script for testing extract_games functions"""
 import os
+from unittest.mock import patch
 from bs4 import BeautifulSoup
 
-from extract_games import get_html, parse_app_id_bs, parse_game_bs, parse_price_bs, system_requirements, get_genre_from_steam, get_developer_name, get_publisher_name, convert_to_csv
+from extract_games import get_html, parse_app_id_bs, parse_game_bs, parse_price_bs, system_requirements, get_genre_from_steam, get_developer_name, get_publisher_name, update_game_information, convert_to_csv
 
 
 def test_html_returns_a_string():
@@ -82,6 +83,16 @@ def test_publisher_name(fake_response):
     assert result == 'Fake Publisher'
 
 
+@patch("extract_games.update_game")
+def test_every_game_updated_in_order(fake_update):
+    """Check each game is updated and the order of the games kept"""
+    fake_update.side_effect = lambda game: {**game, 'updated': True}
+    result = update_game_information([{'app_id': '1'}, {'app_id': '2'}])
+
+    assert fake_update.call_count == 2
+    assert result == [{'app_id': '1', 'updated': True}, {'app_id': '2', 'updated': True}]
+
+
 def test_csv_created():
     """Check CSV file is created"""
     assert not os.path.exists('test.csv')
@@ -1,151 +1,232 @@
 """Testing script for load_games script"""
+import struct
 from unittest.mock import MagicMock, patch
-from load_games import execute_batch_columns, execute_batch_columns_for_genres, execute_batch_columns_for_games, get_existing_platform_data, add_to_genre_link_table, add_to_publisher_link_table, add_to_developer_link_table, upload_developers, upload_publishers, upload_genres, upload_games, get_all_game_genre_ids, get_all_developer_game_ids, get_all_publisher_game_ids
+from psycopg2 import sql
+import pandas as pd
+from load_games import copy_to_staging_table, insert_distinct_columns, insert_distinct_genres, encode_games_binary, insert_games_binary, get_platforms, insert_links_from_staging, copy_csv_to_staging_table, upload_games_from_csv, upload_developers, upload_publishers, upload_genres, upload_games, upload_game_genre_link, upload_game_publisher_link, upload_game_developer_link, upload_game_links, upload_independent_tables, get_db_connection_pool
 
 
-@patch("load_games.execute_batch")
-def test_execute_batch_columns_given_publisher_data(fake_batch, fake_publisher_data):
-    """Test appropriate commands called for function"""
-    fake_conn = MagicMock()
-    execute_batch_columns(fake_conn, fake_publisher_data,
-                          'publisher', "publisher_name", page_size=100)
+def test_copy_to_staging_table_given_publisher_data(fake_publisher_data, fake_conn, fake_cursor):
+    """Test staging table created and data copied to it"""
+    copy_to_staging_table(fake_conn, fake_publisher_data.to_frame(),
+                          'staging_publisher', sql.SQL("publisher_name TEXT"))
 
-    assert fake_batch.call_count == 1
+    assert fake_cursor.execute.call_count == 1
+    assert fake_cursor.copy_expert.call_count == 1
+    copied_data = fake_cursor.copy_expert.call_args[0][1].getvalue()
+    assert copied_data == "fake publisher 1\nfake_publisher 2\n"
 
 
-@patch("load_games.execute_batch")
-def test_execute_batch_columns_given_genre_data(fake_batch, fake_genre_data):
-    """Test appropriate commands called for function"""
-    fake_conn = MagicMock()
-    execute_batch_columns_for_genres(fake_conn, fake_genre_data,
-                                     'genre', page_size=100)
+@patch("load_games.copy_to_staging_table")
+def test_insert_distinct_columns_given_publisher_data(fake_copy, fake_publisher_data, fake_conn, fake_cursor):
+    """Test data staged and inserted with a single query"""
+    fake_execute = fake_cursor.execute
+    insert_distinct_columns(fake_conn, fake_publisher_data,
+                            'publisher', 'publisher_name')
 
-    assert fake_batch.call_count == 1
+    assert fake_copy.call_count == 1
+    assert fake_execute.call_count == 1
+    assert fake_conn.commit.call_count == 1
 
 
-@patch("load_games.execute_batch")
-def test_execute_batch_columns_given_game_data(fake_batch, fake_game_data):
-    """Test appropriate commands called for function"""
-    fake_conn = MagicMock()
-    execute_batch_columns_for_games(fake_conn, fake_game_data,
-                                    'game', page_size=100)
+@patch("load_games.copy_to_staging_table")
+def test_insert_distinct_genres_given_genre_data(fake_copy, fake_genre_data, fake_conn, fake_cursor):
+    """Test genre data staged and inserted with a single query"""
+    fake_execute = fake_cursor.execute
+    insert_distinct_genres(fake_conn, fake_genre_data)
 
-    assert fake_batch.call_count == 1
+    assert fake_copy.call_count == 1
+    assert fake_execute.call_count == 1
+    assert fake_conn.commit.call_count == 1
 
 
-def test_platform_data_retrieved():
-    """Appropriate commands called for existing data"""
-    fake_conn = MagicMock()
-    fake_fetch = fake_conn.cursor().__enter__().fetchone
-    fake_fetch.return_value = {'platform_id': 1}
-    result = get_existing_platform_data('True', 'False', 'True', fake_conn, {})
+def test_encode_games_binary_given_game_data(fake_game_data):
+    """Test game rows framed in the binary COPY format"""
+    encoded = encode_games_binary(fake_game_data).getvalue()
+
+    assert encoded.startswith(b'PGCOPY\n\xff\r\n\x00')
+    assert encoded.endswith(struct.pack('!h', -1))
+    field_count, app_id_length, app_id, title_length = struct.unpack('!hiii', encoded[19:33])
+    assert (field_count, app_id_length, app_id) == (6, 4, 1)
+    assert encoded[33:33 + title_length] == b'fake_title 1'
+    assert struct.unpack('!ii', encoded[33 + title_length:41 + title_length]) == (4, 8648)
+
 
-    assert result == 1
+def test_insert_games_binary_given_game_data(fake_game_data, fake_conn, fake_cursor):
+    """Test games staged with binary COPY and inserted with a single query"""
+    insert_games_binary(fake_conn, fake_game_data)
 
+    assert fake_cursor.copy_expert.call_count == 1
+    assert fake_cursor.execute.call_count == 2
+    assert fake_conn.commit.call_count == 1
 
-def test_all_game_id_commands_called(fake_game_and_genre):
-    """Test appropriate commands called to get game id data"""
-    fake_conn = MagicMock()
-    fake_execute = fake_conn.cursor().__enter__().execute
-    fake_fetch = fake_conn.cursor().__enter__().fetchall
-    fake_fetch.return_value = [{'game_id': 1, 'genre_id': 2}]
 
-    result = get_all_game_genre_ids(fake_conn, fake_game_and_genre)
+def test_platform_data_retrieved(fake_conn, fake_cursor):
+    """Appropriate commands called for existing data"""
+    fake_execute = fake_cursor.execute
+    fake_fetch = fake_cursor.fetchall
+    fake_fetch.return_value = [(1, True, False, True), (2, False, False, False)]
+    result = get_platforms(fake_conn)
 
     assert fake_execute.call_count == 1
-    assert fake_fetch.call_count == 1
-    assert result == [(1, 2, 1, 2)]
+    assert result == {(True, False, True): 1, (False, False, False): 2}
 
 
-def test_all_publisher_id_commands_called(fake_game_and_publisher):
-    """Test appropriate commands called to get game id data"""
-    fake_conn = MagicMock()
-    fake_execute = fake_conn.cursor().__enter__().execute
-    fake_fetch = fake_conn.cursor().__enter__().fetchall
-    fake_fetch.return_value = [{'game_id': 2, 'publisher_id': 3}]
+@patch("load_games.copy_to_staging_table")
+def test_insert_links_from_staging_commands(fake_copy, fake_game_and_genre, fake_conn, fake_cursor):
+    """Test link data staged and upserted with a single query"""
+    fake_execute = fake_cursor.execute
 
-    result = get_all_publisher_game_ids(fake_conn, fake_game_and_publisher)
+    insert_links_from_staging(fake_conn, fake_game_and_genre, 'staging_game_genre',
+                              sql.SQL("app_id INT"), "fake query")
 
-    assert fake_execute.call_count == 1
-    assert fake_fetch.call_count == 1
-    assert result == [(2, 3, 2, 3)]
+    assert fake_copy.call_count == 1
+    fake_execute.assert_called_once_with("fake query")
+    assert fake_conn.commit.call_count == 0
+
+
+def test_copy_csv_to_staging_table_uses_file_header(tmp_path, fake_conn, fake_cursor):
+    """Test staging columns taken from the csv header and the file streamed to COPY"""
+    fake_file = tmp_path / "fake_games.csv"
+    fake_file.write_text(",app_id,title\n0,1,fake game\n", encoding='utf-8')
 
+    copy_csv_to_staging_table(fake_conn, str(fake_file), 'staging_game')
 
-def test_all_developer_id_commands_called(fake_game_and_developer):
-    """Test appropriate commands called to get game id data"""
-    fake_conn = MagicMock()
-    fake_execute = fake_conn.cursor().__enter__().execute
-    fake_fetch = fake_conn.cursor().__enter__().fetchall
-    fake_fetch.return_value = [{'game_id': 2, 'developer_id': 3}]
+    create_query = repr(fake_cursor.execute.call_args[0][0])
+    for column in ['row_index', 'app_id', 'title']:
+        assert f"Identifier('{column}')" in create_query
+    assert fake_cursor.copy_expert.call_count == 1
 
-    result = get_all_developer_game_ids(fake_conn, fake_game_and_developer)
 
+@patch("load_games.copy_csv_to_staging_table")
+def test_upload_games_from_csv_commands(fake_copy, fake_conn, fake_cursor):
+    """Test games csv staged and inserted with a single query"""
+    fake_execute = fake_cursor.execute
+
+    upload_games_from_csv("final_games.csv", fake_conn)
+
+    fake_copy.assert_called_once_with(fake_conn, "final_games.csv", 'staging_game')
     assert fake_execute.call_count == 1
-    assert fake_fetch.call_count == 1
-    assert result == [(2, 3, 2, 3)]
+    insert_query = fake_execute.call_args[0][0]
+    assert "LEFT JOIN" not in insert_query
+    assert "release_date IS NOT NULL" in insert_query
+    assert fake_conn.commit.call_count == 1
 
 
-@patch("load_games.execute_batch")
-def test_genre_link_table_commands(fake_batch, fake_tuples):
+@patch("load_games.insert_links_from_staging")
+def test_genre_link_table_commands(fake_insert, fake_game_and_genre, fake_conn):
     """Test appropriate commands called for genre link table"""
-    fake_conn = MagicMock()
 
-    add_to_genre_link_table(fake_conn, fake_tuples, 100)
+    upload_game_genre_link(fake_game_and_genre, fake_conn)
 
-    assert fake_batch.call_count == 1
+    assert fake_insert.call_count == 1
+    assert fake_insert.call_args[0][2] == "staging_game_genre"
 
 
-@patch("load_games.execute_batch")
-def test_publisher_link_table_commands(fake_batch, fake_tuples):
+@patch("load_games.insert_links_from_staging")
+def test_publisher_link_table_commands(fake_insert, fake_game_and_publisher, fake_conn):
     """Test appropriate commands called for publisher link table"""
-    fake_conn = MagicMock()
 
-    add_to_publisher_link_table(fake_conn, fake_tuples, 100)
+    upload_game_publisher_link(fake_game_and_publisher, fake_conn)
 
-    assert fake_batch.call_count == 1
+    assert fake_insert.call_count == 1
+    assert fake_insert.call_args[0][2] == "staging_game_publisher"
 
 
-@patch("load_games.execute_batch")
-def test_developer_link_table_commands(fake_batch, fake_tuples):
+@patch("load_games.insert_links_from_staging")
+def test_developer_link_table_commands(fake_insert, fake_game_and_developer, fake_conn):
     """Test appropriate commands called for developer link table"""
-    fake_conn = MagicMock()
 
-    add_to_developer_link_table(fake_conn, fake_tuples, 100)
+    upload_game_developer_link(fake_game_and_developer, fake_conn)
 
-    assert fake_batch.call_count == 1
+    assert fake_insert.call_count == 1
+    assert fake_insert.call_args[0][2] == "staging_game_developer"
 
 
-@patch("load_games.execute_batch_columns")
-def test_developers_called(fake_batch, fake_complete_data):
+@patch("load_games.insert_distinct_columns")
+def test_developers_called(fake_batch, fake_complete_data, fake_conn):
     """Test appropriate functions called for developers"""
-    fake_conn = MagicMock()
-    upload_developers(fake_conn, fake_complete_data)
+    upload_developers(fake_complete_data, fake_conn)
 
     assert fake_batch.call_count == 1
 
 
-@patch("load_games.execute_batch_columns")
-def test_publishers_called(fake_batch, fake_complete_data):
+@patch("load_games.insert_distinct_columns")
+def test_publishers_called(fake_batch, fake_complete_data, fake_conn):
     """Test appropriate functions called for publishers"""
-    fake_conn = MagicMock()
-    upload_publishers(fake_conn, fake_complete_data)
+    upload_publishers(fake_complete_data, fake_conn)
 
     assert fake_batch.call_count == 1
 
 
-@patch("load_games.execute_batch_columns_for_genres")
-def test_genres_called(fake_batch, fake_complete_data):
+@patch("load_games.insert_distinct_genres")
+def test_genres_called(fake_batch, fake_complete_data, fake_conn):
     """Test appropriate functions called for genres"""
-    fake_conn = MagicMock()
-    upload_genres(fake_conn, fake_complete_data)
+    fake_complete_data = fake_complete_data.rename(
+        columns={'user generated': 'user_generated'})
+    upload_genres(fake_complete_data, fake_conn)
 
     assert fake_batch.call_count == 1
 
 
-@patch("load_games.execute_batch_columns_for_games")
-def test_games_called(fake_batch, fake_complete_data):
+@patch("load_games.insert_games_binary")
+def test_games_called(fake_batch, fake_complete_data, fake_conn, fake_cursor):
     """Test appropriate functions called for games"""
-    fake_conn = MagicMock()
-    upload_games(fake_conn, fake_complete_data)
+    fake_fetch = fake_cursor.fetchall
+    fake_fetch.return_value = [(1, False, True, True)]
+    upload_games(fake_complete_data, fake_conn)
 
     assert fake_batch.call_count == 1
+    assert list(fake_batch.call_args[0][1]['platform_id']) == [1, 1]
+
+
+@patch("load_games.insert_games_binary")
+def test_games_without_release_date_skipped(fake_batch, fake_complete_data, fake_conn, fake_cursor):
+    """Test games with a missing release date or title are not encoded"""
+    fake_cursor.fetchall.return_value = [(1, False, True, True)]
+    fake_complete_data['release_date'] = pd.to_datetime(
+        fake_complete_data['release_date'])
+    fake_complete_data.loc[0, 'release_date'] = pd.NaT
+    upload_games(fake_complete_data, fake_conn)
+
+    games_to_load = fake_batch.call_args[0][1]
+    assert list(games_to_load['app_id']) == [2]
+    assert encode_games_binary(games_to_load).getvalue().endswith(struct.pack('!h', -1))
+
+
+@patch("load_games.insert_links_from_staging")
+def test_game_links_committed_once(fake_insert, fake_complete_data, fake_conn):
+    """Test all three link tables uploaded in a single transaction"""
+    fake_complete_data = fake_complete_data.rename(columns={'user generated': 'user_generated'})
+
+    upload_game_links(fake_complete_data, fake_conn)
+
+    assert fake_insert.call_count == 3
+    assert fake_conn.commit.call_count == 1
+
+
+@patch("load_games.upload_genres")
+@patch("load_games.upload_developers")
+@patch("load_games.upload_publishers")
+def test_independent_tables_use_own_connections(fake_publishers, fake_developers,
+                                                fake_genres, fake_complete_data):
+    """Test each independent upload runs on a connection returned to the pool"""
+    fake_pool = MagicMock()
+
+    upload_independent_tables(fake_pool, fake_complete_data)
+
+    for fake_upload in [fake_publishers, fake_developers, fake_genres]:
+        fake_upload.assert_called_once_with(
+            fake_complete_data, fake_pool.getconn.return_value)
+    assert fake_pool.getconn.call_count == 3
+    assert fake_pool.putconn.call_count == 3
+
+
+@patch("load_games.ThreadedConnectionPool")
+def test_connection_pool_skips_synchronous_commit(fake_pool):
+    """Test pooled load connections do not wait on a WAL flush per commit"""
+    get_db_connection_pool({'DATABASE_USERNAME': 'user', 'DATABASE_PASSWORD': 'password',
+                            'DATABASE_ENDPOINT': 'host', 'DATABASE_PORT': 5432,
+                            'DATABASE_NAME': 'steam'})
+
+    assert fake_pool.call_args[1]['options'] == '-c synchronous_commit=off'
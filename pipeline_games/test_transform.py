@@ -1,8 +1,9 @@
 """Testing file for transform script"""
 import pytest
+import pandas as pd
 from pandas._libs.tslibs.timestamps import Timestamp
 
-from transform_games import identify_unique_genre, create_user_generated_column, drop_unnecessary_columns, convert_date_to_datetime, convert_price_to_float, explode_column_to_individual_rows, check_data_is_not_null
+from transform_games import identify_unique_genre, create_user_generated_column, drop_unnecessary_columns, convert_date_to_datetime, convert_price_to_float, convert_prices_to_float, explode_column_to_individual_rows, explode_many, check_data_is_not_null, normalize_missing, transform_all
 
 
 def test_separate_rows_created_for_unique_tags(fake_raw_data):
@@ -14,11 +15,47 @@ def test_separate_rows_created_for_unique_tags(fake_raw_data):
     assert 'genre' in list(result.columns)
 
 
+def test_missing_tags_do_not_become_genres(fake_raw_data):
+    """Tests that a game without user tags only gets a row per genre"""
+    fake_raw_data['user_tags'] = None
+    result = identify_unique_genre(fake_raw_data)
+    assert list(result['genre']) == ["Adventure", "Early Access"]
+
+
+def test_game_without_tags_or_genres_kept(fake_raw_data):
+    """Tests that a game with no tags and no genres keeps one row without a genre"""
+    fake_raw_data['user_tags'] = ''
+    fake_raw_data['genres'] = ''
+    result = identify_unique_genre(fake_raw_data)
+    assert result.shape[0] == 1
+    assert result['genre'].isna().all()
+
+
+def test_transform_all_keeps_game_without_genres(fake_raw_data):
+    """Tests that a game with no tags and no genres is still loaded as a game"""
+    fake_raw_data = fake_raw_data.rename(
+        columns={'full price': 'full_price', 'sale price': 'sale_price'})
+    fake_raw_data['user_tags'] = ''
+    fake_raw_data['genres'] = ''
+    final_df, games_df = transform_all(fake_raw_data)
+    assert final_df['genre'].isna().all()
+    assert list(games_df['app_id']) == [2246030]
+
+
 def test_user_generated_column_created(fake_data_with_tags):
     """Check new column added to dataframe"""
     assert len(fake_data_with_tags.columns) == 13
     result = create_user_generated_column(fake_data_with_tags)
     assert len(result.columns) == 14
+    assert list(result['user_generated']) == [False]
+
+
+def test_user_generated_checked_against_own_game_genres():
+    """Check a tag is only a Steam genre if it is a genre of the same game"""
+    fake_data = pd.DataFrame({'app_id': [1, 2], 'genres': ["Action,Indie", "Strategy"],
+                              'genre': ["Action", "Action"]})
+    result = create_user_generated_column(fake_data)
+    assert list(result['user_generated']) == [False, True]
 
 
 def test_columns_dropped(fake_data_with_tags):
@@ -51,6 +88,15 @@ def test_prices_converted_to_float(fake_price, expected_result):
     assert result == expected_result
 
 
+def test_price_columns_converted_to_float():
+    """Test every price in the given columns converted in one call"""
+    fake_prices = pd.DataFrame({'full_price': ["£5.30", "Free to play"],
+                                'sale_price': ["£4.30", None]})
+    result = convert_prices_to_float(fake_prices, ['full_price', 'sale_price'])
+    assert list(result['full_price']) == [5.3, 0.0]
+    assert list(result['sale_price']) == [4.3, 0.0]
+
+
 def test_explode_columns(fake_raw_data):
     """Test atomic rows created for rows with more than one value for specified column"""
     assert fake_raw_data.shape[0] == 1
@@ -58,9 +104,38 @@ def test_explode_columns(fake_raw_data):
     assert result.shape[0] == 2
 
 
+def test_explode_many_columns(fake_raw_data):
+    """Test a row created for each combination of values in the specified columns"""
+    fake_raw_data['publishers'] = "Fake,Fake3"
+    result = explode_many(fake_raw_data, ['developers', 'publishers'])
+    assert result.shape[0] == 4
+    assert list(result['publishers']) == ["Fake", "Fake3", "Fake", "Fake3"]
+
+
 @pytest.mark.parametrize("fake_data, expected_result", [(None, "Data not provided"), ("Fake publisher", "Fake publisher")])
 def test_data_is_not_null_function(fake_data, expected_result):
     """Test data returned if valid or generic string if not valid"""
     result = check_data_is_not_null(fake_data)
     assert isinstance(result, str) is True
     assert result == expected_result
+
+
+def test_missing_data_normalized():
+    """Test missing values in the given columns replaced and valid values kept"""
+    fake_data = pd.DataFrame({'developers': ["Fake developer", None],
+                              'publishers': ["N/A", "Fake publisher"]})
+    result = normalize_missing(fake_data, ['developers', 'publishers'])
+    assert list(result['developers']) == ["Fake developer", "Data not provided"]
+    assert list(result['publishers']) == ["Data not provided", "Fake publisher"]
+
+
+def test_transform_all_returns_exploded_and_games_data(fake_raw_data):
+    """Test one call returns a row per genre, developer and publisher and a row per game"""
+    fake_raw_data = fake_raw_data.rename(
+        columns={'full price': 'full_price', 'sale price': 'sale_price'})
+    final_df, games_df = transform_all(fake_raw_data)
+    assert final_df.shape[0] == 8
+    assert {'genre', 'user_generated', 'developers', 'publishers'} <= set(final_df.columns)
+    assert games_df.shape[0] == 1
+    assert games_df.iloc[0]['full_price'] == 3.39
+    assert str(games_df.iloc[0]['release_date']) == "2023-09-05 00:00:00"
@@ -1,38 +1,48 @@
 """Script for transforming games data"""
 import pandas as pd
 from pandas._libs.tslibs.timestamps import Timestamp
-import numpy as np
+
+MISSING_DATA_VALUES = ['N/A', 'None', 'Null', 'nan', 'NaN', '']
+STRING_COLUMNS = ['user_tags', 'genres', 'developers', 'publishers',
+                  'release_date', 'full_price', 'sale_price']
 
 
 def identify_unique_genre(data: pd.DataFrame) -> pd.DataFrame:
     """Generates a genre column from user_tags and genres"""
-    data['genre'] = data['user_tags'].astype(str) + "," + data["genres"]
-    data = explode_column_to_individual_rows(data, 'genre')
-    data = data.drop_duplicates()
+    data['genre'] = data['user_tags'].fillna('').str.cat(
+        data['genres'].fillna(''), sep=',').str.split(',')
+    data = data.explode('genre')
+    is_empty = data['genre'] == ''
+    has_genre = data['app_id'].isin(data.loc[~is_empty, 'app_id'])
+    data = data[~(is_empty & has_genre)].drop_duplicates(subset=['app_id', 'genre'])
+    data['genre'] = data['genre'].mask(data['genre'] == '')
     return data
 
 
 def create_user_generated_column(data: pd.DataFrame) -> pd.DataFrame:
-    """Compares tag to genres and determine if tag is user-generated or not"""
-    data['user_generated'] = np.where(
-        np.isin(data['genre'], data['genres']), False, True)
+    """Compares each tag to the genres of its own game and determine if tag is user-generated or not"""
+    game_genres = data[['app_id', 'genres']].drop_duplicates('app_id')
+    game_genres = game_genres.assign(
+        genres=game_genres['genres'].str.split(',')).explode('genres')
+    steam_genres = pd.MultiIndex.from_frame(game_genres)
+    data['user_generated'] = ~pd.MultiIndex.from_arrays(
+        [data['app_id'], data['genre']]).isin(steam_genres)
 
     return data
 
 
 def drop_unnecessary_columns(data: pd.DataFrame, column_name: str) -> pd.DataFrame:
     """Removes the no longer need columns"""
-    data = data.drop(column_name, axis=1)
+    data.drop(columns=column_name, inplace=True)
 
     return data
 
 
 def convert_date_to_datetime(date: str) -> Timestamp | None:
     """Validates date, if appropriate"""
-    try:
-        new_date = pd.to_datetime(date, format="%d %b, %Y")
-    except ValueError:
-        new_date = None
+    new_date = pd.to_datetime(date, format="%d %b, %Y", errors="coerce")
+    if pd.isna(new_date):
+        return None
 
     return new_date
 
@@ -46,6 +56,17 @@ def convert_price_to_float(price: str | float) -> float:
     return 0.00
 
 
+def convert_prices_to_float(data: pd.DataFrame, column_names: list[str]) -> pd.DataFrame:
+    """Changes all prices in the given columns to floats in one vectorized pass per column"""
+    for column_name in column_names:
+        prices = data[column_name].astype(str)
+        is_priced = prices.str.contains('£', regex=False)
+        data[column_name] = prices.str.replace(
+            '£', '', regex=False).where(is_priced).astype(float).fillna(0.0)
+
+    return data
+
+
 def explode_column_to_individual_rows(data: pd.DataFrame, column_name: str) -> pd.DataFrame:
     """Make unique rows for each unique element in column"""
     data[column_name] = data[column_name].str.split(',')
@@ -54,47 +75,60 @@ def explode_column_to_individual_rows(data: pd.DataFrame, column_name: str) -> p
     return data
 
 
+def explode_many(data: pd.DataFrame, column_names: list[str]) -> pd.DataFrame:
+    """Make unique rows for each combination of elements in the given columns,
+    splitting every column before any rows are duplicated"""
+    for column_name in column_names:
+        data[column_name] = data[column_name].str.split(',')
+    for column_name in column_names:
+        data = data.explode(column_name)
+
+    return data
+
+
 def check_data_is_not_null(data_value: str) -> str:
-    if str(data_value) in ['N/A', 'None', 'Null', 'nan', 'NaN', '']:
+    if str(data_value) in MISSING_DATA_VALUES:
         return "Data not provided"
     return data_value
 
 
-if __name__ == "__main__":
-
-    data_frame = pd.read_csv('games.csv')
+def normalize_missing(data: pd.DataFrame, column_names: list[str]) -> pd.DataFrame:
+    """Replaces missing values in the given columns with a generic string in one pass per column"""
+    for column_name in column_names:
+        is_missing = data[column_name].isna() | data[column_name].isin(MISSING_DATA_VALUES)
+        data[column_name] = data[column_name].where(
+            ~is_missing, "Data not provided")
 
-    unique_genre_df = identify_unique_genre(data_frame)
-    user_generated_df = create_user_generated_column(unique_genre_df)
-    data_frame_no_genres = drop_unnecessary_columns(
-        user_generated_df, 'genres')
-    data_with_unique_genre_only = drop_unnecessary_columns(
-        data_frame_no_genres, 'user_tags')
+    return data
 
-    data_with_unique_genre_only['release_date'] = data_with_unique_genre_only['release_date'].apply(
-        convert_date_to_datetime)
 
-    data_with_unique_genre_only['full_price'] = data_with_unique_genre_only['full_price'].apply(
-        convert_price_to_float)
+def transform_all(data: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Runs every transform step on the raw game data and returns
+    the exploded data alongside the games only data.
+    Per game columns are converted before any rows are exploded"""
+    data = data.astype({column: 'string[pyarrow]' for column in STRING_COLUMNS})
+    data['release_date'] = pd.to_datetime(
+        data['release_date'], format="%d %b, %Y", errors="coerce")
+    data = convert_prices_to_float(data, ['full_price', 'sale_price'])
+    data = normalize_missing(data, ['developers', 'publishers'])
+    data = (data.pipe(identify_unique_genre)
+            .pipe(create_user_generated_column)
+            .drop(columns=['genres', 'user_tags']))
+    final_df = explode_many(data, ['developers', 'publishers'])
 
-    data_with_unique_genre_only['sale_price'] = data_with_unique_genre_only['sale_price'].apply(
-        convert_price_to_float)
+    games_df = final_df.drop(
+        columns=['genre', 'user_generated', 'developers', 'publishers']).drop_duplicates(subset=['app_id'])
 
-    data_with_unique_genre_only['developers'] = data_with_unique_genre_only['developers'].apply(
-        check_data_is_not_null)
+    return final_df, games_df
 
-    data_with_unique_genre_only['publishers'] = data_with_unique_genre_only['publishers'].apply(
-        check_data_is_not_null)
 
-    unique_developers = explode_column_to_individual_rows(
-        data_with_unique_genre_only, 'developers')
-    final_df = explode_column_to_individual_rows(
-        unique_developers, 'publishers')
+if __name__ == "__main__":
 
-    final_df.to_csv('genres.csv')
+    data_frame = pd.read_csv(
+        'games.csv', engine='pyarrow',
+        dtype={column: 'string[pyarrow]' for column in STRING_COLUMNS})
 
-    for column in ['genre', 'user_generated', 'developers', 'publishers']:
-        final_df = drop_unnecessary_columns(final_df, column)
+    final_df, games_df = transform_all(data_frame)
 
-    games_df = final_df.drop_duplicates()
+    final_df.to_parquet('genres.parquet', compression='zstd', index=False)
     games_df.to_csv('final_games.csv')
@@ -1,8 +1,9 @@
 """File with fixtures for tests for review pipeline"""
 
+from unittest.mock import MagicMock
+
 from pytest import fixture
 from pandas import DataFrame
-from unittest.mock import MagicMock
 
 
 @fixture
@@ -13,6 +14,26 @@ def fake_df_load():
 
 
 @fixture
+def fake_connection() -> MagicMock:
+    """Returns a fake database connection"""
+    return MagicMock()
+
+
+@fixture
+def fake_cursor(fake_connection: MagicMock) -> MagicMock:
+    """Returns the cursor given by the fake connection's cursor context manager"""
+    return fake_connection.cursor.return_value.__enter__.return_value
+
+
+@fixture
+def fake_session_get(monkeypatch) -> MagicMock:
+    """Replaces the shared Steam session's get with a mock"""
+    fake_get = MagicMock()
+    monkeypatch.setattr("extract.SESSION.get", fake_get)
+    return fake_get
+
+
+@fixture(scope="session")
 def fake_review() -> str:
     """Returns a fake review for testing"""
     return "Test\n,;review fail"
@@ -24,7 +45,7 @@ def fake_df_sentiment(fake_review: str) -> DataFrame:
     return DataFrame([{"review": fake_review}], index=[1])
 
 
-@fixture
+@fixture(scope="session")
 def time_string() -> str:
     """Returns a timestamp string for testing"""
     return "2019-02-23 12:13:10"
@@ -39,12 +60,8 @@ def fake_df_transform(time_string: str) -> DataFrame:
                        "last_timestamp": time_string, "game_id": 2}])
 
 
-def mock_multiprocessing() -> MagicMock:
-    "Returns a magic mock to mock multiprocessing"
-    return MagicMock()
-
-
 def mock_get_game_reviews(*args) -> list:
     """Returns a mock game review"""
-    test_review = {"review": "test"}
+    test_review = {"review": "test", "votes_up": 1, "timestamp_created": 1672531200,
+                   "author": {"playtime_forever": 10}}
     return [[test_review]]
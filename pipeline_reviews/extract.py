@@ -1,16 +1,46 @@
 """Retrieves reviews for a game from game IDs"""
 
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from os import environ
-from multiprocessing import Pool
 from urllib.parse import quote_plus
 
-from pandas import DataFrame
+from pandas import DataFrame, json_normalize, to_datetime
+from dateutil.tz import tzlocal
 from dotenv import load_dotenv
 from psycopg2 import connect
 from psycopg2.extensions import connection
 from psycopg2.extras import RealDictCursor
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    from orjson import loads
+except ImportError:
+    from json import loads
+
+
+def create_session() -> requests.Session:
+    """Returns a session that pools and retries connections to the Steam store"""
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(
+        pool_connections=1, pool_maxsize=64,
+        max_retries=Retry(total=3, backoff_factor=0.3,
+                          status_forcelist=[429, 500, 502, 503, 504])))
+    session.headers.update({"Accept-Encoding": "gzip, deflate",
+                            "User-Agent": "SteamPulse/1.0"})
+    return session
+
+
+MAX_WORKERS = 32
+SESSION = create_session()
+TIMEOUT = 10
+REVIEWS_URL = "https://store.steampowered.com/appreviews/{game_id}?json=1"
+REVIEWS_PAGE_URL = REVIEWS_URL + ("&num_per_page=100&language=english"
+                                  "&filter=recent&purchase_type=all&cursor={cursor}")
+REVIEW_DTYPES = {"game_id": "int64", "review": "object", "review_score": "int64",
+                 "last_timestamp": "object", "playtime_last_2_weeks": "int64"}
 
 
 class GamesNotFound(Exception):
@@ -20,84 +50,90 @@ class GamesNotFound(Exception):
         super().__init__(message)
 
 
+class ReviewsNotFound(Exception):
+    """Exception class for when the new games have no reviews. Returns a message"""
+
+    def __init__(self, message="No reviews were found for the new games!"):
+        super().__init__(message)
+
+
 def get_number_of_reviews(game_id: int) -> int:
     """Retrieves total number of all reviews from a given game ID"""
     try:
-        request = requests.get(
-            f"https://store.steampowered.com/appreviews/{game_id}?json=1", timeout=10)
-        reviews_info = request.json()
+        request = SESSION.get(REVIEWS_URL.format(game_id=game_id), timeout=TIMEOUT)
+        reviews_info = loads(request.content)
         return reviews_info["query_summary"]["total_reviews"]
     except requests.exceptions.Timeout:
         return 0
 
 
 def get_reviews_for_game(game_id: int, cursor: str) -> dict:
-    """Retrieves all reviews from a given review page (cursor)
+    """Retrieves all raw reviews from a given review page (cursor)
     for a chosen game by its ID"""
-    cursor = quote_plus(cursor)
-
     try:
-        request = requests.get(f"""https://store.steampowered.com/appreviews/
-                {game_id}?json=1&num_per_page=100&language=english&cursor={cursor}""", timeout=10)
-        reviews = request.json()
+        request = SESSION.get(REVIEWS_PAGE_URL.format(
+            game_id=game_id, cursor=quote_plus(cursor)), timeout=TIMEOUT)
+        reviews = loads(request.content)
         next_cursor = reviews["cursor"]
 
     except requests.exceptions.Timeout:
         return {"error": "Timeout on the response!"}
-    page_reviews = []
-
-    for review in reviews["reviews"]:
-        review_dict = {}
-        review_dict["game_id"] = game_id
-        review_dict["review"] = review["review"]
-        review_dict["review_score"] = review["votes_up"]
-        review_dict["last_timestamp"] = datetime.fromtimestamp(
-            review["timestamp_created"]).strftime("%Y-%m-%d %H:%M:%S")
-        review_dict["playtime_last_2_weeks"] = review["author"]["playtime_forever"]
-        page_reviews.append(review_dict)
-    return {"next_cursor": next_cursor, "reviews": page_reviews}
+    return {"next_cursor": next_cursor, "reviews": reviews["reviews"]}
 
 
 def get_game_reviews(game: int) -> list:
-    """Retrieves game reviews to be combined into a list together"""
-    number_of_total_reviews = get_number_of_reviews(game)
+    """Retrieves game reviews to be combined into a list together.
+    A game without reviews stops at its empty first page"""
     all_reviews = []
-    if number_of_total_reviews:
-        cursor_list = []
-        cursor = "*"
-
-        while cursor not in cursor_list:
-            cursor_list.append(cursor)
-            api_response = get_reviews_for_game(game, cursor)
-            if "error" not in api_response:
-                cursor = api_response["next_cursor"]
-                page_reviews = api_response["reviews"]
-                if not page_reviews or cursor in cursor_list:
-                    return all_reviews
-                all_reviews.append(page_reviews)
+    seen_cursors = set()
+    cursor = "*"
+
+    while cursor not in seen_cursors:
+        seen_cursors.add(cursor)
+        api_response = get_reviews_for_game(game, cursor)
+        if "error" not in api_response:
+            cursor = api_response["next_cursor"]
+            page_reviews = api_response["reviews"]
+            if not page_reviews or cursor in seen_cursors:
+                return all_reviews
+            all_reviews.append(page_reviews)
     return all_reviews
 
 
-def get_all_reviews(game_ids: list[int]) -> DataFrame:
-    """Combines all reviews together
-    with the use of multiprocessing"""
-    list_of_reviews = []
+def build_reviews_data_frame(raw_reviews: list[dict], game_ids: list[int]) -> DataFrame:
+    """Builds the reviews data-frame from raw API reviews
+    with one vectorized operation per column, giving timestamps in local time"""
+    if not raw_reviews:
+        return DataFrame(columns=list(REVIEW_DTYPES)).astype(REVIEW_DTYPES)
+    reviews_df = json_normalize(raw_reviews, sep="_")
+    return DataFrame({
+        "game_id": game_ids,
+        "review": reviews_df["review"],
+        "review_score": reviews_df["votes_up"],
+        "last_timestamp": to_datetime(reviews_df["timestamp_created"], unit="s", utc=True)
+            .dt.tz_convert(tzlocal()).dt.strftime("%Y-%m-%d %H:%M:%S"),
+        "playtime_last_2_weeks": reviews_df["author_playtime_forever"]})
 
-    with Pool() as p:
-        reviews_data = p.map(get_game_reviews, game_ids)
 
-    for set_reviews in reviews_data:
-        list_of_reviews.extend(set_reviews)
+def get_all_reviews(game_ids: list[int]) -> DataFrame:
+    """Combines all reviews together, walking the review
+    pages of several games at once over the shared session"""
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        reviews_data = executor.map(get_game_reviews, game_ids)
 
-    returned_reviews = []
-    for reviews in list_of_reviews:
-        returned_reviews.extend(reviews)
+    raw_reviews = []
+    review_game_ids = []
+    for game_id, game_pages in zip(game_ids, reviews_data):
+        for page_reviews in game_pages:
+            raw_reviews.extend(page_reviews)
+            review_game_ids.extend([game_id] * len(page_reviews))
 
-    return DataFrame(returned_reviews)
+    return build_reviews_data_frame(raw_reviews, review_game_ids)
 
 
+@lru_cache(maxsize=1)
 def get_db_connection() -> connection:
-    """Returns PSQL database connection"""
+    """Returns PSQL database connection, shared by every step of a run"""
     load_dotenv()
     return connect(dbname=environ["DATABASE_NAME"],
                    user=environ["DATABASE_USERNAME"],
@@ -1,9 +1,10 @@
 """Loads reviews into the database"""
 
+from io import StringIO
+
 from pandas import DataFrame
 from psycopg2 import Error
 from psycopg2.extensions import connection
-from psycopg2.extras import execute_batch
 
 from transform import remove_empty_rows
 
@@ -11,39 +12,47 @@ from transform import remove_empty_rows
 def get_game_ids_foreign_key_values(conn: connection, reviews_df: DataFrame) -> DataFrame:
     """Returns data-frame with game_ids from db for
     foreign keys"""
-    cache_dict = {}
-    reviews_df["game_id"] = reviews_df["game_id"].apply(
-        lambda row: get_game_ids(conn, row, cache_dict))
+    game_ids = get_game_ids(conn, reviews_df["game_id"].unique().tolist())
+    reviews_df["game_id"] = reviews_df["game_id"].map(game_ids)
     reviews_df = remove_empty_rows(reviews_df)
     return reviews_df
 
 
-def get_game_ids(conn: connection, app_id: int, cache: dict) -> int | None:
-    """Returns game_id from game table from db (foreign key)"""
-    if str(app_id) in cache:
-        return cache[str(app_id)]
+def get_game_ids(conn: connection, app_ids: list[int]) -> dict:
+    """Returns game_id for each app_id from game table from db
+    (foreign keys) with a single query"""
     try:
         with conn.cursor() as cur:
             cur.execute(
-                """SELECT game_id FROM game WHERE app_id = %s""", (app_id,))
-            game_id = cur.fetchone()
-        game_id = game_id["game_id"]
-        cache[str(app_id)] = game_id
-    except (Error, TypeError) as err:
+                """SELECT app_id, game_id FROM game WHERE app_id = ANY(%s)""", (app_ids,))
+            game_ids = cur.fetchall()
+    except Error as err:
         print("Error at load: ", err)
-        return None
-    return game_id
+        return {}
+    return {game_id["app_id"]: game_id["game_id"] for game_id in game_ids}
 
 
 def move_reviews_to_db(conn: connection, reviews_df: DataFrame) -> None:
-    """Moves all reviews into the database"""
-    data_to_insert = [tuple(row) for row in reviews_df.values]
+    """Moves all reviews into the database by copying them
+    into a staging table and inserting the new ones from there"""
+    buffer = StringIO()
+    reviews_df.to_csv(buffer, index=False, header=False, na_rep=r"\N")
+    buffer.seek(0)
     try:
         with conn.cursor() as cur:
-            execute_batch(cur, """INSERT INTO review (game_id, review_text, review_score, reviewed_at,
-        playtime_last_2_weeks, sentiment) VALUES (%s, %s, %s, %s, %s, %s) ON CONFLICT DO NOTHING""", data_to_insert)
+            cur.execute("""CREATE TEMP TABLE IF NOT EXISTS staging_review (game_id FLOAT,
+        review_text TEXT, review_score FLOAT, reviewed_at DATE,
+        playtime_last_2_weeks FLOAT, sentiment FLOAT);
+        TRUNCATE staging_review;""")
+            cur.copy_expert(
+                "COPY staging_review FROM STDIN WITH (FORMAT CSV, NULL '\\N')", buffer)
+            cur.execute("""INSERT INTO review (game_id, review_text, review_score, reviewed_at,
+        playtime_last_2_weeks, sentiment)
+        SELECT game_id, review_text, review_score, reviewed_at, playtime_last_2_weeks, sentiment
+        FROM staging_review ON CONFLICT DO NOTHING""")
             conn.commit()
     except Error as err:
         print("Error at load: ", err)
+        conn.rollback()
     finally:
         conn.close()
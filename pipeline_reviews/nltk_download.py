@@ -2,7 +2,18 @@
 
 import nltk
 
+NLTK_RESOURCES = {"stopwords": "corpora/stopwords",
+                  "vader_lexicon": "sentiment/vader_lexicon.zip"}
+
+
+def download_missing_resources(resources: dict) -> None:
+    """Downloads only the nltk resources that are not installed yet"""
+    for resource, path in resources.items():
+        try:
+            nltk.data.find(path)
+        except LookupError:
+            nltk.download(resource, quiet=True)
+
 
 if __name__ == "__main__":
-    nltk.download('stopwords')
-    nltk.download('vader_lexicon')
+    download_missing_resources(NLTK_RESOURCES)
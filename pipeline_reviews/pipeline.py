@@ -4,7 +4,8 @@ from datetime import datetime
 
 from psycopg2 import Error
 
-from extract import get_db_connection, get_game_ids, get_all_reviews, GamesNotFound
+from extract import get_db_connection, get_game_ids, get_all_reviews
+from extract import GamesNotFound, ReviewsNotFound
 from transform import transform_reviews, remove_unnamed
 from sentiment import isolate_non_stop_words, get_sentiment_values
 from load import get_game_ids_foreign_key_values, move_reviews_to_db
@@ -15,8 +16,9 @@ if __name__ == "__main__":
         print("Extracting...")
         db_connection = get_db_connection()
         game_ids = get_game_ids(db_connection)
-        # TODO add multiprocessing for this:
         reviews = get_all_reviews(game_ids)
+        if reviews.empty:
+            raise ReviewsNotFound()
         time_finished_extract = datetime.now()
         time_taken = time_finished_extract - time_started
         print(f"Total extraction time: {time_taken.total_seconds()} seconds.")
@@ -44,5 +46,5 @@ if __name__ == "__main__":
 
     except Error as e:
         print("Connection Error: ", e)
-    except GamesNotFound as e:
+    except (GamesNotFound, ReviewsNotFound) as e:
         print(e)
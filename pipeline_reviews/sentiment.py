@@ -1,15 +1,31 @@
 """Sentiment analysis on extracted reviews"""
 
+import re
+from functools import lru_cache
+from multiprocessing import Pool
+from os import cpu_count
+
+import numpy as np
 from pandas import DataFrame
 from nltk.corpus import stopwords
 from nltk.sentiment.vader import SentimentIntensityAnalyzer
 
 
+def create_punctuation_table(punctuation: list[str]) -> dict:
+    """Returns a translation table that deletes the given punctuation"""
+    return str.maketrans("", "", "".join(punctuation))
+
+
+def create_stopword_pattern(stop_words: list[str]) -> re.Pattern:
+    """Returns a pattern matching any stop word as a whole word, ignoring case"""
+    return re.compile(r"(?i)(?<!\S)(?:" + "|".join(map(re.escape, stop_words)) + r")(?!\S)")
+
+
 def remove_stopwords(review: str, stop_words: list[str], punctuation: list[str]) -> str:
     """Returns review without stop words and most punctuation"""
-    review = "".join(letter for letter in review if letter not in punctuation)
-    split_review = review.replace("\n"," ").split(" ")
-    return " ".join(word for word in split_review if word.lower() not in stop_words)
+    review = review.translate(create_punctuation_table(punctuation)).replace("\n", " ")
+    review = create_stopword_pattern(stop_words).sub("", review)
+    return " ".join(review.split())
 
 
 def isolate_non_stop_words(reviews_df: DataFrame) -> DataFrame:
@@ -19,18 +35,31 @@ def isolate_non_stop_words(reviews_df: DataFrame) -> DataFrame:
     punctuation_and_more = ["/",".",",","@","£","#","+","=","_",
             "-",")","(","*","^","%","$","~","`","'",'"',"<",">","1",
             "0","2","3","4","5","6","7","8","9",";",":","|","{","}","[","]"]
-    reviews_df["clean_review"] = reviews_df["review"].apply(
-        lambda review: remove_stopwords(review, stop_words, punctuation_and_more))
+    reviews_df["clean_review"] = (reviews_df["review"]
+        .str.translate(create_punctuation_table(punctuation_and_more))
+        .str.replace(create_stopword_pattern(stop_words), " ", regex=True)
+        .str.replace(r"\s+", " ", regex=True)
+        .str.strip())
     return reviews_df
 
 
+@lru_cache(maxsize=1)
+def get_vader() -> SentimentIntensityAnalyzer:
+    """Returns the VADER analyser, loading its lexicon once per worker process"""
+    return SentimentIntensityAnalyzer()
+
+
+def score_reviews(reviews: list[str]) -> list[float]:
+    """Returns the compound VADER score for each review in a chunk"""
+    vader = get_vader()
+    return [vader.polarity_scores(review)["compound"] for review in reviews]
+
+
 def get_sentiment_values(reviews_df: DataFrame) -> DataFrame:
-    """Returns a data-frame with sentiment scores for each review"""
-    vader = SentimentIntensityAnalyzer()
-    reviews_df_copy = reviews_df.copy()
-    reviews_df_copy["sentiment"] = reviews_df_copy["clean_review"].apply(lambda review:
-                    vader.polarity_scores(review)["compound"])
-    reviews_df_copy["sentiment"] = reviews_df_copy["sentiment"].apply(
-            lambda score: round((score + 1)/2 * 5, 1))
-    reviews_df_copy.drop(columns=["clean_review"], inplace=True)
-    return reviews_df_copy
+    """Returns a data-frame with sentiment scores for each review,
+    scoring chunks of reviews on every core"""
+    chunks = np.array_split(reviews_df["clean_review"].to_numpy(), cpu_count())
+    with Pool(initializer=get_vader) as pool:
+        scores = np.concatenate(pool.map(score_reviews, chunks))
+    return reviews_df.drop(columns=["clean_review"]).assign(
+        sentiment=np.round((scores + 1) * 2.5, 1))
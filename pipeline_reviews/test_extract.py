@@ -1,31 +1,29 @@
 """File with unit tests for extract.py"""
 
+from time import tzset
 from unittest.mock import MagicMock
 
-from pytest import raises
+from pytest import mark, raises
 from requests.exceptions import Timeout
 
-from conftest import mock_multiprocessing, mock_get_game_reviews
+from conftest import mock_get_game_reviews
 from extract import get_game_ids, GamesNotFound, get_db_connection
 from extract import get_all_reviews, get_reviews_for_game
-from extract import get_number_of_reviews, get_game_reviews
+from extract import get_number_of_reviews, get_game_reviews, create_session
+from extract import build_reviews_data_frame
 
 
-def test_get_game_ids_passes():
+def test_get_game_ids_passes(fake_connection, fake_cursor):
     """Verifies that app_ids were correctly formatted from
     mocked psql query response"""
-    fake_connection = MagicMock()
-    fake_cursor = fake_connection.cursor().__enter__()
     fake_fetch = fake_cursor.fetchall
     fake_fetch.return_value = [{"app_id": 1}, {"app_id": 2}]
     assert get_game_ids(fake_connection) == [1, 2]
 
 
-def test_get_game_ids_fails():
+def test_get_game_ids_fails(fake_connection, fake_cursor):
     """Verifies that extract script raises GamesNotFound
     error if no games were returned"""
-    fake_connection = MagicMock()
-    fake_cursor = fake_connection.cursor().__enter__()
     fake_fetch = fake_cursor.fetchall
     fake_fetch.return_value = []
     with raises(GamesNotFound):
@@ -36,64 +34,112 @@ def test_get_db_connection(monkeypatch):
     """Mocks PSQL connection and checks that it was returned"""
     monkeypatch.setattr("extract.environ", MagicMock())
     monkeypatch.setattr("extract.connect", lambda **kwargs: None)
+    get_db_connection.cache_clear()
     assert get_db_connection() is None
+    get_db_connection.cache_clear()
 
 
-def test_get_number_of_reviews(monkeypatch):
+def test_get_db_connection_reused(monkeypatch):
+    """Verifies that the connection is only opened once per run"""
+    monkeypatch.setattr("extract.environ", MagicMock())
+    fake_connect = MagicMock()
+    monkeypatch.setattr("extract.connect", fake_connect)
+    get_db_connection.cache_clear()
+    assert get_db_connection() is get_db_connection()
+    assert fake_connect.call_count == 1
+    get_db_connection.cache_clear()
+
+
+def test_create_session_retries_server_errors():
+    """Verifies that the session retries throttled and failed requests"""
+    adapter = create_session().get_adapter("https://store.steampowered.com")
+    assert adapter.max_retries.total == 3
+    assert 429 in adapter.max_retries.status_forcelist
+
+
+def test_create_session_requests_compressed_responses():
+    """Verifies that the session asks Steam for compressed responses"""
+    assert "gzip" in create_session().headers["Accept-Encoding"]
+
+
+def test_get_number_of_reviews(fake_session_get):
     """Verifies that get request is correctly finding the number of reviews"""
-    fake_response = MagicMock()
-    fake_response.json.return_value = {
-        "query_summary": {"total_reviews": "test"}}
-    monkeypatch.setattr("requests.get", lambda *args, **kwargs: fake_response)
+    fake_session_get.return_value.content = b'{"query_summary": {"total_reviews": "test"}}'
     assert get_number_of_reviews(0) == "test"
 
 
-def test_get_game_reviews_errors(monkeypatch):
-    """Verifies that if error is found, an empty list is returned"""
-    monkeypatch.setattr("extract.get_number_of_reviews", lambda *args: 1)
-    monkeypatch.setattr("extract.get_reviews_for_game", lambda *args: {"error": "test"})
-    assert not get_game_reviews(0)
+@mark.parametrize("api_response, expected", [
+    ({"error": "test"}, []),
+    ({"next_cursor": "test", "reviews": []}, []),
+    ({"next_cursor": "test", "reviews": [{}, {}]}, [[{}, {}]])])
+def test_get_game_reviews(monkeypatch, api_response, expected):
+    """Verifies that review pages are collected until an error or an empty page"""
+    monkeypatch.setattr("extract.get_reviews_for_game", lambda *args: api_response)
+    assert get_game_reviews(0) == expected
 
 
-def test_get_game_reviews_no_reviews(monkeypatch):
-    """Verifies that no data is returned from no reviews"""
-    monkeypatch.setattr("extract.get_number_of_reviews", lambda *args: 1)
-    monkeypatch.setattr("extract.get_reviews_for_game", lambda *args: {
-        "next_cursor": "test", "reviews": []})
+def test_get_game_reviews_single_request_without_reviews(monkeypatch):
+    """Verifies that a game without reviews costs a single page request"""
+    fake_get_reviews = MagicMock(return_value={"next_cursor": "test", "reviews": []})
+    monkeypatch.setattr("extract.get_reviews_for_game", fake_get_reviews)
     assert not get_game_reviews(0)
+    assert fake_get_reviews.call_count == 1
 
 
-def test_get_game_reviews_one_review(monkeypatch):
-    """Verifies that reviews are correctly formed from the extraction"""
-    monkeypatch.setattr("extract.get_number_of_reviews", lambda *args: 1)
-    monkeypatch.setattr("extract.get_reviews_for_game", lambda *args: {
-        "next_cursor": "test", "reviews": [{},{}]})
-    assert get_game_reviews(0) == [[{},{}]]
-
-
-def test_get_reviews_for_game_raises_error(monkeypatch):
+def test_get_reviews_for_game_raises_error(fake_session_get):
     """Verifies that the test correctly identifies timeout error"""
-    fake_response = MagicMock()
-    fake_response.json.side_effect = Timeout()
-    monkeypatch.setattr("requests.get", lambda *args, **kwargs: fake_response)
+    fake_session_get.side_effect = Timeout()
     assert "error" in get_reviews_for_game(10, "").keys()
 
 
-def test_get_reviews_for_game_basic(monkeypatch):
+def test_get_reviews_for_game_basic(fake_session_get):
     """Verifies that reviews from mocked API request are collected correctly"""
-    fake_response = MagicMock()
-    fake_response.json.return_value = {"cursor": "", "reviews":
-                                       [{"review": 1, "votes_up": 1, "timestamp_created": 1672531200,
-                                         "author": {"playtime_forever": 10}}]}
-    monkeypatch.setattr("requests.get", lambda *args, **kwargs: fake_response)
+    fake_session_get.return_value.content = b"""{"cursor": "", "reviews":
+        [{"review": 1, "votes_up": 1, "timestamp_created": 1672531200,
+          "author": {"playtime_forever": 10}}]}"""
     assert get_reviews_for_game(10, "") == {"next_cursor": "", "reviews": [
-        {"game_id": 10, "last_timestamp": "2023-01-01 00:00:00",
-         "playtime_last_2_weeks": 10, "review": 1, "review_score": 1}]}
+        {"review": 1, "votes_up": 1, "timestamp_created": 1672531200,
+         "author": {"playtime_forever": 10}}]}
+
+
+def test_get_reviews_for_game_url(fake_session_get):
+    """Verifies that the review page URL has no whitespace and an encoded cursor"""
+    fake_session_get.return_value.content = b'{"cursor": "", "reviews": []}'
+    get_reviews_for_game(10, "AoJ+/w==")
+    url = fake_session_get.call_args.args[0]
+    assert url.startswith("https://store.steampowered.com/appreviews/10?json=1")
+    assert url.endswith("&cursor=AoJ%2B%2Fw%3D%3D")
+    assert not any(char.isspace() for char in url)
 
 
 def test_get_all_reviews(monkeypatch):
-    """Verifies that values from multiprocessing are correctly unpacked"""
-    monkeypatch.setattr("multiprocessing.Pool", mock_multiprocessing)
+    """Verifies that values from the worker threads are correctly unpacked"""
     monkeypatch.setattr("extract.get_game_reviews", mock_get_game_reviews)
     returned_df = get_all_reviews([1])
-    assert returned_df.values == "test"
+    assert returned_df.to_dict("records") == [
+        {"game_id": 1, "review": "test", "review_score": 1,
+         "last_timestamp": "2023-01-01 00:00:00", "playtime_last_2_weeks": 10}]
+
+
+def test_build_reviews_data_frame_local_time(monkeypatch):
+    """Verifies that review timestamps are formatted in the local time zone"""
+    monkeypatch.setenv("TZ", "America/New_York")
+    tzset()
+    try:
+        returned_df = build_reviews_data_frame(
+            [{"review": "test", "votes_up": 1, "timestamp_created": 1672531200,
+              "author": {"playtime_forever": 10}}], [1])
+    finally:
+        monkeypatch.undo()
+        tzset()
+    assert returned_df["last_timestamp"].tolist() == ["2022-12-31 19:00:00"]
+
+
+def test_get_all_reviews_no_reviews(monkeypatch):
+    """Verifies that an empty data-frame is returned when no game has reviews"""
+    monkeypatch.setattr("extract.get_game_reviews", lambda *args: [])
+    returned_df = get_all_reviews([1, 2])
+    assert returned_df.empty
+    assert returned_df.dtypes.to_dict() == {
+        "game_id": "int64", "review": "object", "review_score": "int64",
+        "last_timestamp": "object", "playtime_last_2_weeks": "int64"}
@@ -1,6 +1,6 @@
 """File with unit tests for load.py"""
 
-from unittest.mock import MagicMock
+from pandas import DataFrame
 
 from load import get_game_ids_foreign_key_values, get_game_ids, move_reviews_to_db
 
@@ -8,28 +8,36 @@ from load import get_game_ids_foreign_key_values, get_game_ids, move_reviews_to_
 def test_get_game_ids_foreign_key_values(monkeypatch, fake_df_load):
     """Verifies that data-frame gets correctly modified with nan
     cell values taken out for the full row and correct game_ids replaced"""
-    monkeypatch.setattr("load.get_game_ids", lambda *args: 1)
+    monkeypatch.setattr("load.get_game_ids", lambda *args: {2: 1, 3: 1, 8: 1})
     assumed_result_df = fake_df_load.assign(game_id=1)
     assumed_result_df = assumed_result_df[assumed_result_df["test"].notna()]
     returned_df = get_game_ids_foreign_key_values("", fake_df_load)
     assert returned_df.equals(assumed_result_df)
 
 
-def test_get_game_ids():
+def test_get_game_ids(fake_connection, fake_cursor):
     """Verifies that get_game_ids returns correctly
-    formatted value from sql query"""
-    fake_connection = MagicMock()
-    fake_cursor = fake_connection.cursor().__enter__()
-    fake_fetch = fake_cursor.fetchone
-    fake_fetch.return_value = {"game_id": 1}
-    returned_val = get_game_ids(fake_connection, 0, {})
-    assert returned_val == 1
-
-
-def test_move_reviews_to_db(monkeypatch, fake_df_load, capfd):
-    """Verifies that execute_batch was called"""
-    fake_connection = MagicMock()
-    monkeypatch.setattr("load.execute_batch", lambda *args: print("Data committed!"))
+    formatted values from a single sql query"""
+    fake_fetch = fake_cursor.fetchall
+    fake_fetch.return_value = [{"app_id": 10, "game_id": 1}, {"app_id": 20, "game_id": 2}]
+    returned_val = get_game_ids(fake_connection, [10, 20])
+    assert returned_val == {10: 1, 20: 2}
+    assert fake_cursor.execute.call_count == 1
+
+
+def test_move_reviews_to_db(fake_df_load, fake_connection, fake_cursor):
+    """Verifies that reviews are copied into staging and inserted in one statement"""
     move_reviews_to_db(fake_connection, fake_df_load)
-    captured = capfd.readouterr()
-    assert "Data committed!" in captured.out
+    copied_rows = fake_cursor.copy_expert.call_args.args[1].getvalue()
+    assert copied_rows == "2,9.0\n3,5.0\n8,\\N\n"
+    assert "INSERT INTO review" in fake_cursor.execute.call_args.args[0]
+    assert fake_connection.commit.called
+    assert fake_connection.close.called
+
+
+def test_move_reviews_to_db_empty_review(fake_connection, fake_cursor):
+    """Verifies that an empty review stays distinct from the NULL marker"""
+    move_reviews_to_db(fake_connection, DataFrame([{"game_id": 1, "review": ""}]))
+    copied_rows = fake_cursor.copy_expert.call_args.args[1].getvalue()
+    assert copied_rows == "1,\n"
+    assert "NULL '\\N'" in fake_cursor.copy_expert.call_args.args[0]
@@ -3,6 +3,7 @@
 from unittest.mock import MagicMock
 
 from sentiment import remove_stopwords, isolate_non_stop_words, get_sentiment_values
+from sentiment import get_vader
 
 
 def test_remove_stopwords(fake_review):
@@ -27,5 +28,7 @@ def test_get_sentiment_values(fake_df_sentiment, monkeypatch):
     fake_sentiment_analyser.polarity_scores.return_value = {"compound": 0}
     monkeypatch.setattr("sentiment.SentimentIntensityAnalyzer",
                 lambda *args: fake_sentiment_analyser)
+    get_vader.cache_clear()
     returned_df = get_sentiment_values(fake_df_sentiment)
+    get_vader.cache_clear()
     assert returned_df["sentiment"].values[0] == 2.5
@@ -1,21 +1,21 @@
 """File with unit tests for transform.py"""
 
 from datetime import date
-from unittest.mock import MagicMock
 from pandas import DataFrame
-from numpy import int64
+from numpy import int32
+from psycopg2 import Error
 
-from transform import get_release_date, remove_empty_rows, validate_time_string
+from transform import get_release_dates, remove_empty_rows
 from transform import remove_duplicate_reviews, remove_unnamed, correct_cell_values
 from transform import change_column_types, correct_playtime
 
 
-def test_get_release_date():
-    """Verifies that release date returnes correct value"""
-    fake_connection = MagicMock()
-    fake_cursor = fake_connection.cursor().__enter__()
-    fake_fetch = fake_cursor.fetchone.return_value = {"release_date": 1}
-    assert get_release_date(0, fake_connection, {}) == 1
+def test_get_release_dates(fake_connection, fake_cursor):
+    """Verifies that release dates are returned for every game from a single query"""
+    fake_cursor.fetchall.return_value = [{"app_id": 0, "release_date": 1},
+                                         {"app_id": 5, "release_date": 2}]
+    assert get_release_dates(fake_connection, [0, 5]) == {0: 1, 5: 2}
+    assert fake_cursor.execute.call_count == 1
 
 
 def test_remove_empty_rows():
@@ -24,17 +24,6 @@ def test_remove_empty_rows():
     assert remove_empty_rows(fake_df).empty
 
 
-def test_validate_time_string_basic(time_string):
-    """Verifies that correct object type
-    is returned (date) from a timestamp string"""
-    assert isinstance(validate_time_string(time_string), date)
-
-
-def test_validate_time_string_error():
-    """Verifies that when error occurs, None is returned"""
-    assert validate_time_string(None) is None
-
-
 def test_remove_duplicate_reviews():
     """Verifies that duplicate rows are removed"""
     fake_review = {"review": "test", "game_id": 1, "playtime_last_2_weeks": 55}
@@ -53,20 +42,60 @@ def test_correct_cell_values(fake_df_transform):
     assert correct_cell_values(fake_df_transform).shape == (1, 4)
 
 
+def test_correct_cell_values_empty_cells(fake_df_transform):
+    """Verifies that rows with empty cells are removed in the same pass"""
+    fake_df_transform.loc[1, "last_timestamp"] = None
+    assert correct_cell_values(fake_df_transform).empty
+
+
 def test_change_column_types(fake_df_transform):
     """Verifies that column types are correctly changed"""
     returned_df = change_column_types(fake_df_transform)
     assert all(isinstance(val, date)
                for val in returned_df["last_timestamp"].values)
-    assert all(isinstance(val, int64)
+    assert all(isinstance(val, int32)
                for val in returned_df["review_score"].values)
-    assert all(isinstance(val, int64) for val in
+    assert all(isinstance(val, int32) for val in
                returned_df["playtime_last_2_weeks"].values)
+    assert returned_df["game_id"].dtype == int32
+
+
+def test_change_column_types_invalid_timestamp(fake_df_transform):
+    """Verifies that timestamps in the wrong format become missing values"""
+    fake_df_transform.loc[0, "last_timestamp"] = "23/02/2019"
+    returned_df = change_column_types(fake_df_transform)
+    assert returned_df["last_timestamp"].isna().tolist() == [True, False]
 
 
-def test_correct_playtime(monkeypatch, time_string, fake_df_transform):
+def test_correct_playtime(monkeypatch, fake_df_transform):
     """Verifies that function correctly identifies that playtime is valid"""
     monkeypatch.setattr("transform.get_db_connection", lambda *args: None)
-    monkeypatch.setattr("transform.get_release_date",
-                        lambda *args: validate_time_string(time_string))
+    monkeypatch.setattr("transform.get_release_dates",
+                        lambda *args: {1: date(2019, 2, 23),
+                                       2: date(2019, 2, 23)})
+    assert correct_playtime(fake_df_transform).equals(fake_df_transform)
+
+
+def test_correct_playtime_unknown_game(monkeypatch, fake_df_transform):
+    """Verifies that reviews of games without a release date are dropped"""
+    monkeypatch.setattr("transform.get_db_connection", lambda *args: None)
+    monkeypatch.setattr("transform.get_release_dates",
+                        lambda *args: {1: date(2019, 2, 23)})
+    assert correct_playtime(fake_df_transform)["game_id"].tolist() == [1]
+
+
+def test_correct_playtime_after_release(monkeypatch, fake_df_transform):
+    """Verifies that playtime longer than the time since release is dropped"""
+    monkeypatch.setattr("transform.get_db_connection", lambda *args: None)
+    monkeypatch.setattr("transform.get_release_dates",
+                        lambda *args: {1: date.today(), 2: date.today()})
+    assert correct_playtime(fake_df_transform)["game_id"].tolist() == [1]
+
+
+def test_correct_playtime_query_error(monkeypatch, fake_df_transform,
+                                     fake_connection, fake_cursor):
+    """Verifies that a failed query is rolled back so the shared connection stays usable"""
+    monkeypatch.setattr("transform.get_db_connection", lambda *args: fake_connection)
+    fake_cursor.execute.side_effect = Error
     assert correct_playtime(fake_df_transform).equals(fake_df_transform)
+    assert fake_connection.rollback.called
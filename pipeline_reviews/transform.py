@@ -1,7 +1,6 @@
 """Validates received review inputs"""
 
-from datetime import datetime, date
-
+import numpy as np
 import pandas as pd
 from pandas import DataFrame
 from psycopg2 import Error
@@ -10,38 +9,35 @@ from psycopg2.extensions import connection
 from extract import get_db_connection
 
 
-def get_release_date(game_id: int, conn: connection, cache: dict) -> date:
-    """Retrieves the release date for a game with a provided ID"""
-    if game_id in cache:
-        return cache[game_id]
+def get_release_dates(conn: connection, game_ids: list[int]) -> dict:
+    """Retrieves the release date for every game with a provided ID
+    with a single query"""
     with conn.cursor() as cur:
         cur.execute(
-            "SELECT release_date FROM game WHERE app_id = %s;", [game_id])
-        release_date = cur.fetchone()["release_date"]
-    cache[game_id] = release_date
-    return cache[game_id]
+            "SELECT app_id, release_date FROM game WHERE app_id = ANY(%s);", (game_ids,))
+        release_dates = cur.fetchall()
+    return {release_date["app_id"]: release_date["release_date"]
+            for release_date in release_dates}
 
 
 def correct_playtime(reviews_df: DataFrame) -> DataFrame:
-    """Returns a data-frame with valid playtime recordings only"""
-    reviews_df_copy = reviews_df.copy()
-
+    """Returns a data-frame with valid playtime recordings only.
+    Reviews of games without a release date are dropped"""
+    conn = get_db_connection()
     try:
-        release_date_cache = {}
-        conn = get_db_connection()
-        reviews_df_copy["release_date"] = reviews_df_copy["game_id"].apply(
-            lambda row: get_release_date(row, conn, release_date_cache))
-        time_now = datetime.now().date()
-        reviews_df_copy["maximum_playtime_since_release"] = reviews_df_copy["release_date"].apply(
-            lambda row: (time_now - row).total_seconds()/60)
-        reviews_df_copy = reviews_df_copy[
-            reviews_df_copy["playtime_last_2_weeks"] <= reviews_df_copy["maximum_playtime_since_release"]]
-        reviews_df_copy.drop(
-            columns=["maximum_playtime_since_release", "release_date"], inplace=True)
-
-    except (Error, ValueError) as err:
+        release_dates = get_release_dates(conn, reviews_df["game_id"].unique().tolist())
+        release_dates = pd.to_datetime(reviews_df["game_id"].map(release_dates)).to_numpy()
+        time_now = pd.Timestamp.now().normalize().to_datetime64()
+        maximum_playtime_since_release = (time_now - release_dates) / np.timedelta64(1, "m")
+        return reviews_df[
+            reviews_df["playtime_last_2_weeks"].to_numpy() <= maximum_playtime_since_release]
+
+    except Error as err:
+        print("Error at transform: ", err)
+        conn.rollback()
+    except ValueError as err:
         print("Error at transform: ", err)
-    return reviews_df_copy
+    return reviews_df
 
 
 def remove_empty_rows(reviews_df: DataFrame) -> DataFrame:
@@ -54,27 +50,20 @@ def change_column_types(reviews_df: DataFrame) -> DataFrame:
     """Returns a data-frame with correct data types"""
     columns_to_numeric = ["review_score", "playtime_last_2_weeks"]
 
-    for column in columns_to_numeric:
-        reviews_df[column] = pd.to_numeric(reviews_df[column], errors="coerce")
-        reviews_df = reviews_df.dropna(subset=[column])
-    reviews_df["last_timestamp"] = reviews_df["last_timestamp"].apply(
-        validate_time_string)
+    reviews_df[columns_to_numeric] = reviews_df[columns_to_numeric].apply(
+        pd.to_numeric, errors="coerce")
+    reviews_df = reviews_df.dropna(subset=columns_to_numeric).astype(
+        {"game_id": "int32", "review_score": "int32", "playtime_last_2_weeks": "int32"})
+    reviews_df["last_timestamp"] = pd.to_datetime(
+        reviews_df["last_timestamp"], format="%Y-%m-%d %H:%M:%S", errors="coerce").dt.date
     return reviews_df
 
 
-def validate_time_string(row: str) -> date | None:
-    """Returns datetime object or None if wrong format"""
-    try:
-        return datetime.strptime(row, "%Y-%m-%d %H:%M:%S").date()
-    except (TypeError, ValueError):
-        return None
-
-
 def correct_cell_values(reviews_df: DataFrame) -> DataFrame:
-    """Drops rows with invalid cell values"""
-    reviews_df = reviews_df[reviews_df["review_score"] >= 0]
-    reviews_df = reviews_df[reviews_df["playtime_last_2_weeks"] >= 1]
-    return reviews_df
+    """Drops rows with empty or invalid cell values in a single pass"""
+    return reviews_df[reviews_df.notna().all(axis=1)
+                      & (reviews_df["review_score"] >= 0)
+                      & (reviews_df["playtime_last_2_weeks"] >= 1)]
 
 
 def remove_duplicate_reviews(review_df: DataFrame) -> DataFrame:
@@ -86,16 +75,14 @@ def remove_duplicate_reviews(review_df: DataFrame) -> DataFrame:
 
 def remove_unnamed(reviews_df: DataFrame) -> DataFrame:
     """Removes automatically generated unnamed column"""
-    reviews_df_copy = reviews_df.copy()
     if "Unnamed: 0" in reviews_df.columns:
-        reviews_df_copy.drop(columns="Unnamed: 0", inplace=True)
-    return reviews_df_copy
+        return reviews_df.drop(columns="Unnamed: 0")
+    return reviews_df
 
 
 def transform_reviews(reviews_df: DataFrame) -> DataFrame:
     """Transforms the reviews data to be valid"""
     reviews_df = change_column_types(reviews_df)
-    reviews_df = remove_empty_rows(reviews_df)
     reviews_df = correct_cell_values(reviews_df)
     reviews_df = remove_duplicate_reviews(reviews_df)
     reviews_df = correct_playtime(reviews_df)
@@ -1,8 +1,8 @@
 """Python Script: Build a report for email attachment"""
 from datetime import datetime, timedelta
+from io import StringIO
 from os import environ, _Environ
 
-from functools import reduce
 from email.mime.multipart import MIMEMultipart
 from email.mime.application import MIMEApplication
 from email.mime.text import MIMEText
@@ -42,13 +42,15 @@ def get_db_connection(config_file: _Environ) -> connection:
         raise err
 
 
-def get_database(conn_postgres: connection) -> DataFrame:
+def get_database(conn_postgres: connection, days_back: int = 8) -> DataFrame:
     """
     Returns redshift database transaction table as a DataFrame Object
 
     Args:
         conn_postgres (connection): A connection to a Postgres database
 
+        days_back (int): The number of days before the current date to fetch releases for
+
     Returns:
         DataFrame:  A pandas DataFrame containing all relevant release data
     """
@@ -75,8 +77,17 @@ def get_database(conn_postgres: connection) -> DataFrame:
             LEFT JOIN game_publisher_link as publisher_link ON\
             game.game_id=publisher_link.game_id\
             LEFT JOIN publisher ON\
-            publisher_link.publisher_id=publisher.publisher_id;"
-    df_releases = pd.read_sql_query(query, conn_postgres)
+            publisher_link.publisher_id=publisher.publisher_id\
+            WHERE game.release_date >= CURRENT_DATE - %s::int * INTERVAL '1 day'"
+    buffer = StringIO()
+    with conn_postgres.cursor() as cur:
+        release_query = cur.mogrify(query, (days_back,)).decode()
+        cur.copy_expert(f"COPY ({release_query}) TO STDOUT WITH "
+                        "(FORMAT CSV, HEADER, NULL '\\N')", buffer)
+    buffer.seek(0)
+    df_releases = pd.read_csv(buffer, parse_dates=["release_date", "reviewed_at"],
+                              keep_default_na=False, na_values=[r"\N"],
+                              true_values=["t"], false_values=["f"])
 
     return df_releases
 
@@ -96,6 +107,9 @@ def format_database_columns(df_releases: DataFrame) -> DataFrame:
         df_releases['release_date'], format='%d/%m/%Y')
     df_releases["review_date"] = pd.to_datetime(
         df_releases['reviewed_at'], format='%d/%m/%Y')
+    df_releases = df_releases.astype({"game_id": "int32", "title": "category",
+                                      "genre": "category", "developer_name": "category",
+                                      "publisher_name": "category"})
 
     return df_releases
 
@@ -185,7 +199,7 @@ def get_top_rated_release(df_releases: DataFrame) -> str:
         str: A string relating to the title of the highest rated new game released
     """
     df_releases = get_data_for_release_date_range(df_releases, 8)
-    df_ratings = df_releases.groupby("title")["sentiment"].mean(
+    df_ratings = df_releases.groupby("title", observed=True)["sentiment"].mean(
     ).sort_values(ascending=False).reset_index()
 
     return df_ratings.head(1)["title"][0]
@@ -203,34 +217,12 @@ def get_most_reviewed_release(df_releases: DataFrame) -> str:
     """
     df_releases = get_data_for_release_date_range(df_releases, 8)
 
-    df_ratings = df_releases.groupby("title")["review_text"].count(
+    df_ratings = df_releases.groupby("title", observed=True)["review_text"].count(
     ).sort_values(ascending=False).reset_index()
 
     return df_ratings.head(1)["title"][0]
 
 
-def calculate_sum_sentiment(sentiment: float, score: int) -> float:
-    """
-    Calculates total sentiment score by multiplying sentiment associated with
-    a review multiplied by the review_score (represents the number of users who
-    agree with this review)
-
-    Args:
-        sentiment (float): A value associated with how positive or negative the
-        review is considered to be
-
-        score (int): A value associated with the number of users who up-voted a 
-        review
-
-    Returns:
-        float: A sentiment value which takes into account the number of users
-        who agreed with a given review
-    """
-    if score != 0:
-        return sentiment * (score + 1)
-    return sentiment
-
-
 def aggregate_release_data_new_releases(df_releases: DataFrame) -> DataFrame:
     """
     Transform data in releases DataFrame to find aggregated data from individual releases.
@@ -243,12 +235,7 @@ def aggregate_release_data_new_releases(df_releases: DataFrame) -> DataFrame:
         DataFrame: A DataFrame containing new release data with aggregated data for each release
     """
 
-    data_frames = [df_releases]
-
-    df_merged = reduce(lambda left, right: pd.merge(left, right, on=['title'],
-                                                    how='outer'), data_frames)
-
-    df_merged = df_merged.drop_duplicates("title")
+    df_merged = df_releases.drop_duplicates("title")
 
     desired_columns = ["title", "release_date",
                        "sale_price"]
@@ -270,34 +257,22 @@ def aggregate_data(df_releases: DataFrame) -> DataFrame:
         DataFrame: A DataFrame containing new release data with aggregated data for each release
     """
 
-    df_releases["weighted_sentiment"] = df_releases.apply(lambda row:
-                                                          calculate_sum_sentiment(row["sentiment"], row["review_score"]), axis=1)
+    # A review counts once more for every user who up-voted it
+    df_releases["weighted_sentiment"] = df_releases["sentiment"] * \
+        (df_releases["review_score"] + 1).where(df_releases["review_score"] != 0, 1)
 
-    review_rows_count = df_releases.groupby(
-        "game_id")["weighted_sentiment"].count()
-    total_sum_scores = df_releases.groupby(
-        "game_id")["weighted_sentiment"].sum()
-    total_weights = df_releases.groupby("game_id")[
-        "review_score"].sum()
+    df_merged = df_releases.groupby("game_id", sort=False).agg(
+        title=("title", "first"),
+        release_date=("release_date", "first"),
+        sale_price=("sale_price", "first"),
+        review_rows_count=("weighted_sentiment", "count"),
+        total_sum_scores=("weighted_sentiment", "sum"),
+        total_weights=("review_score", "sum"),
+        num_of_reviews=("review_id", "nunique"))
 
-    total_weights = total_weights + review_rows_count
-    total_sentiment_scores = total_sum_scores / total_weights
-
-    df_releases["avg_sentiment"] = df_releases["game_id"].apply(
-        lambda row: round(total_sentiment_scores.loc[row], 1))
-
-    review_per_title = df_releases.groupby('game_id')[
-        'review_id'].nunique()
-    review_per_title = review_per_title.to_frame()
-
-    review_per_title.columns = ["num_of_reviews"]
-
-    data_frames = [df_releases, review_per_title]
-
-    df_merged = reduce(lambda left, right: pd.merge(left, right, on=['game_id'],
-                                                    how='outer'), data_frames)
-
-    df_merged.drop(["weighted_sentiment"], axis=1, inplace=True)
+    total_weights = df_merged["total_weights"] + df_merged["review_rows_count"]
+    df_merged["avg_sentiment"] = (
+        df_merged["total_sum_scores"] / total_weights).round(1)
 
     df_merged = df_merged.drop_duplicates("title")
 
@@ -323,15 +298,12 @@ def format_columns(df_releases: DataFrame) -> DataFrame:
         DataFrame: A DataFrame containing data with formatted columns
     """
 
-    df_releases['Price'] = df_releases['Price'].apply(
-        lambda x: f"£{x:.2f}")
+    df_releases['Price'] = "£" + df_releases['Price'].map("{:.2f}".format)
     df_releases['Release Date'] = df_releases['Release Date'].dt.strftime(
         '%d/%m/%Y')
     if 'Community Sentiment' in df_releases.columns:
-        df_releases['Community Sentiment'] = df_releases['Community Sentiment'].apply(
-            lambda x: round(x, 2))
-        df_releases['Community Sentiment'] = df_releases['Community Sentiment'].fillna(
-            "No Sentiment")
+        df_releases['Community Sentiment'] = df_releases['Community Sentiment'].round(
+            2).fillna("No Sentiment")
 
     return df_releases
 
@@ -416,19 +388,16 @@ def plot_table_small(df_releases: DataFrame, rows: int) -> Chart:
     return chart
 
 
-def plot_trending_games_sentiment_table(df_releases: DataFrame) -> None:
+def plot_trending_games_sentiment_table(df_merged: DataFrame) -> None:
     """
     Create a table for the top recommended games by sentiment
 
     Args:
-        df_releases (DataFrame): A DataFrame containing filtered data related to new releases
+        df_merged (DataFrame): A DataFrame containing aggregated data for each recent release
 
     Returns:
         Chart: A chart displaying plotted table
     """
-    df_releases = get_data_for_release_date_range(df_releases, 8)
-    df_merged = aggregate_data(df_releases)
-
     df_releases = df_merged.sort_values(
         by=["Community Sentiment"], ascending=False)
     df_releases = format_columns(df_releases)
@@ -441,18 +410,16 @@ def plot_trending_games_sentiment_table(df_releases: DataFrame) -> None:
     return chart
 
 
-def plot_trending_games_review_table(df_releases: DataFrame) -> None:
+def plot_trending_games_review_table(df_merged: DataFrame) -> None:
     """
     Create a table for the top recommended games by number of reviews 
 
     Args:
-        df_releases (DataFrame): A DataFrame containing filtered data related to new releases
+        df_merged (DataFrame): A DataFrame containing aggregated data for each recent release
 
     Returns:
         Chart: A chart displaying plotted table
     """
-    df_releases = get_data_for_release_date_range(df_releases, 8)
-    df_merged = aggregate_data(df_releases)
     df_releases = df_merged.sort_values(
         by=["Number of Reviews"], ascending=False)
     df_releases = format_columns(df_releases)
@@ -522,11 +489,13 @@ def create_report(df_releases: DataFrame, dashboard_url: str) -> None:
     top_rated_release = get_top_rated_release(df_releases)
     most_reviewed_release = get_most_reviewed_release(df_releases)
 
+    df_merged = aggregate_data(get_data_for_release_date_range(df_releases, 8))
+
     new_release_table_plot = plot_new_games_today_table(df_releases)
     trending_release_sentiment_table_plot = plot_trending_games_sentiment_table(
-        df_releases)
+        df_merged)
     trending_release_review_table_plot = plot_trending_games_review_table(
-        df_releases)
+        df_merged)
 
     new_release_table_fig = build_figure_from_plot(
         new_release_table_plot, "table_one")
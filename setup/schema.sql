@@ -33,7 +33,8 @@ CREATE TABLE genre(
     genre_id SMALLINT GENERATED ALWAYS AS IDENTITY,
     genre TEXT NOT NULL,
     user_generated BOOLEAN NOT NULL,
-    PRIMARY KEY (genre_id)
+    PRIMARY KEY (genre_id),
+    UNIQUE (genre, user_generated)
 
 );
 
@@ -102,6 +103,7 @@ CREATE TABLE game_genre_link(
     game_id INT NOT NULL, 
     genre_id SMALLINT NOT NULL,
     PRIMARY KEY (genre_link_id),
+    UNIQUE (game_id, genre_id),
     FOREIGN KEY (game_id) REFERENCES game(game_id),
     FOREIGN KEY (genre_id) REFERENCES genre(genre_id)
 
@@ -113,6 +115,7 @@ CREATE TABLE game_developer_link(
     game_id INT NOT NULL, 
     developer_id SMALLINT NOT NULL,
     PRIMARY KEY (developer_link_id),
+    UNIQUE (game_id, developer_id),
     FOREIGN KEY (game_id) REFERENCES game(game_id),
     FOREIGN KEY (developer_id) REFERENCES developer(developer_id)
 
@@ -124,6 +127,7 @@ CREATE TABLE game_publisher_link(
     game_id INT NOT NULL, 
     publisher_id SMALLINT NOT NULL,
     PRIMARY KEY (publisher_link_id),
+    UNIQUE (game_id, publisher_id),
     FOREIGN KEY (game_id) REFERENCES game(game_id),
     FOREIGN KEY (publisher_id) REFERENCES publisher(publisher_id)
 